@@ -1,5 +1,7 @@
-from fastapi import APIRouter
-from app.services.health_service import health_service
+from fastapi import APIRouter, Depends
+from fastapi.responses import JSONResponse
+from app.core.container import container
+from app.services.health_service import HealthService, get_health_service
 import logging
 
 logger = logging.getLogger(__name__)
@@ -14,11 +16,30 @@ async def health_check():
         "version": "1.0.0"
     }
 
+@router.get("/live")
+async def liveness_check():
+    """Liveness probe: the process is up and serving requests"""
+    return {"status": "alive"}
+
+@router.get("/ready")
+async def readiness_check(health_service: HealthService = Depends(get_health_service)):
+    """Readiness probe: 503 until Cassandra is connected and the vectorstore has documents"""
+    readiness = health_service.check_readiness()
+    return JSONResponse(
+        status_code=200 if readiness["ready"] else 503,
+        content=readiness
+    )
+
+@router.get("/startup")
+async def startup_timings():
+    """Initialization time of each component this process has built so far"""
+    return container.get_startup_timings()
+
 @router.get("/vectorstore")
-async def check_vectorstore_health():
+async def check_vectorstore_health(health_service: HealthService = Depends(get_health_service)):
     """Check if vectorstore is working properly"""
     try:
-        health_status = health_service.check_vectorstore_health()
+        health_status = await health_service.check_vectorstore_health()
         return health_status
     except Exception as e:
         logger.error(f"Error checking vectorstore health: {str(e)}")
@@ -30,7 +51,7 @@ async def check_vectorstore_health():
         }
 
 @router.get("/database")
-async def check_database_health():
+async def check_database_health(health_service: HealthService = Depends(get_health_service)):
     """Check if Cassandra is working properly"""
     try:
         health_status = health_service.check_database_health()
@@ -44,7 +65,7 @@ async def check_database_health():
         }
 
 @router.get("/llm")
-async def check_llm_health():
+async def check_llm_health(health_service: HealthService = Depends(get_health_service)):
     """Check if LLM is accessible"""
     try:
         health_status = await health_service.check_llm_health()
@@ -58,7 +79,7 @@ async def check_llm_health():
         }
 
 @router.get("/detailed")
-async def detailed_health_check():
+async def detailed_health_check(health_service: HealthService = Depends(get_health_service)):
     """Comprehensive health check of all components"""
     try:
         detailed_status = await health_service.get_detailed_health()
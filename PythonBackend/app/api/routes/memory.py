@@ -1,27 +1,101 @@
-from fastapi import APIRouter, HTTPException
-from app.models.memory import MemoryData
-from app.services.memory_service import memory_service
+from fastapi import APIRouter, Depends, HTTPException
+from app.config import get_settings
+from app.core.dedup_index import NearDuplicateIndex, get_dedup_index
+from app.models.memory import MemoryData, MemoryBatchRequest
+from app.services.memory_service import MemoryService, get_memory_service
 import logging
 
 logger = logging.getLogger(__name__)
+settings = get_settings()
 router = APIRouter(prefix="/memory", tags=["Memory"])
 
 @router.post("/save")
-async def save_memory(data: MemoryData):
+async def save_memory(
+    data: MemoryData,
+    memory_service: MemoryService = Depends(get_memory_service)
+):
     """Save and embed memory data"""
     try:
         result = await memory_service.save_memory(data)
+        if result.get("duplicate_of"):
+            return {
+                "status": "success",
+                "message": "Memory is a near-duplicate of a saved page, skipped.",
+                "chunks_created": 0,
+                "duplicate_of": result["duplicate_of"]
+            }
         return {
             "status": "success", 
             "message": "Memory saved and embedded.",
-            "chunks_created": result.get("chunks_created", 0)
+            "chunks_created": result.get("chunks_created", 0),
+            "chunks_embedded": result.get("chunks_embedded", 0),
+            "chunks_removed": result.get("chunks_removed", 0)
         }
     except Exception as e:
         logger.error(f"Error saving memory: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/save_batch")
+async def save_memory_batch(
+    data: MemoryBatchRequest,
+    memory_service: MemoryService = Depends(get_memory_service)
+):
+    """Save and embed many memories in one request"""
+    if len(data.items) > settings.memory_batch_max_items:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.memory_batch_max_items} items can be saved per batch"
+        )
+    try:
+        results = await memory_service.save_memories(data.items)
+        saved = sum(1 for result in results if result["status"] == "saved")
+        duplicates = sum(1 for result in results if result["status"] == "duplicate")
+        superseded = sum(1 for result in results if result["status"] == "superseded")
+        failed = sum(1 for result in results if result["status"] == "failed")
+        return {
+            "status": "success" if not failed else "partial" if failed < len(results) else "error",
+            "saved": saved,
+            "duplicates": duplicates,
+            "superseded": superseded,
+            "failed": failed,
+            "chunks_created": sum(result["chunks_created"] for result in results),
+            "chunks_embedded": sum(result["chunks_embedded"] for result in results),
+            "results": results
+        }
+    except Exception as e:
+        logger.error(f"Error saving memory batch: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.delete("/")
+async def delete_memory(
+    url: str,
+    memory_service: MemoryService = Depends(get_memory_service)
+):
+    """Delete every chunk saved from a source URL"""
+    try:
+        deleted = memory_service.delete_memory(url)
+    except Exception as e:
+        logger.error(f"Error deleting memory: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+    if not deleted:
+        raise HTTPException(status_code=404, detail=f"No memory saved from {url}")
+    return {
+        "status": "success",
+        "message": f"Memory from {url} deleted.",
+        "chunks_deleted": deleted
+    }
+
+@router.get("/dedup/stats")
+async def dedup_stats(dedup_index: NearDuplicateIndex = Depends(get_dedup_index)):
+    """Get near-duplicate index statistics"""
+    return dedup_index.get_stats()
+
 @router.get("/search")
-async def search_memory(query: str, limit: int = 5):
+async def search_memory(
+    query: str,
+    limit: int = 5,
+    memory_service: MemoryService = Depends(get_memory_service)
+):
     """Search through saved memories"""
     try:
         results = memory_service.search_memories(query, limit)
@@ -1,27 +1,93 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from app.models.question import QuestionRequest
-from app.services.rag_service import rag_service
+from app.services.rag_service import RAGService, get_rag_service
+from app.services.grading_service import GradingService, get_grading_service
+from app.services.cache_service import SemanticCacheService, get_semantic_cache_service
+from app.services.vectorstore_service import VectorStoreService, get_vectorstore_service
+import json
 import logging
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/rag", tags=["RAG"])
 
-@router.post("/")
-async def rag_answer(req: QuestionRequest):
+def _ensure_ready(vectorstore_service: VectorStoreService = Depends(get_vectorstore_service)):
+    """Fail fast with 503 while the initial ingestion is still populating the vectorstore"""
+    if not vectorstore_service.is_ready():
+        raise HTTPException(
+            status_code=503,
+            detail="Vectorstore is still being built, please retry shortly",
+            headers={"Retry-After": "30"}
+        )
+
+@router.post("/", dependencies=[Depends(_ensure_ready)])
+async def rag_answer(req: QuestionRequest, rag_service: RAGService = Depends(get_rag_service)):
     """Process a question using RAG"""
     try:
-        result = rag_service.process_question(
+        result = await rag_service.aprocess_question(
             question=req.question,
-            session_id=req.session_id
+            session_id=req.session_id,
+            timeout_ms=req.timeout_ms
         )
         
         return {
             "answer": result["simplified_answer"],
             "raw_answer": result["answer"],
             "source": result["source"],
-            "hallucinated": result["hallucination_score"] == "yes",
-            "session_id": req.session_id
+            "hallucinated": result["grounded"] == "no",
+            "session_id": req.session_id,
+            "skipped_stages": result["skipped_stages"]
         }
     except Exception as e:
         logger.error(f"Error in RAG endpoint: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+def _format_sse(event: str, data: dict) -> str:
+    """Format a single server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@router.post("/stream", dependencies=[Depends(_ensure_ready)])
+async def rag_stream(req: QuestionRequest, rag_service: RAGService = Depends(get_rag_service)):
+    """Stream a RAG answer as server-sent events"""
+    async def event_stream():
+        try:
+            async for event in rag_service.astream_question(
+                question=req.question,
+                session_id=req.session_id,
+                timeout_ms=req.timeout_ms
+            ):
+                yield _format_sse(event["event"], event["data"])
+        except Exception as e:
+            logger.error(f"Error in RAG stream endpoint: {str(e)}")
+            yield _format_sse("error", {"detail": str(e)})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/cache/stats")
+async def cache_stats(
+    semantic_cache_service: SemanticCacheService = Depends(get_semantic_cache_service)
+):
+    """Get semantic answer cache statistics"""
+    return semantic_cache_service.get_stats()
+
+@router.get("/grounding/stats")
+async def grounding_stats(grading_service: GradingService = Depends(get_grading_service)):
+    """Get grounding check statistics, including how often the LLM grader is used"""
+    return grading_service.get_grounding_stats()
+
+@router.get("/pipeline/stats")
+async def pipeline_stats(rag_service: RAGService = Depends(get_rag_service)):
+    """Get counters for parallel simplification and speculative fallbacks"""
+    return rag_service.get_pipeline_stats()
+
+@router.delete("/cache")
+async def clear_cache(
+    semantic_cache_service: SemanticCacheService = Depends(get_semantic_cache_service)
+):
+    """Clear the semantic answer cache"""
+    semantic_cache_service.clear()
+    return {"status": "success", "message": "Semantic cache cleared"}
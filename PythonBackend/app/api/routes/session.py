@@ -1,25 +1,42 @@
-from fastapi import APIRouter, HTTPException
-from app.services.session_service import session_service
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from app.services.session_service import SessionService, get_session_service
 import logging
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/session", tags=["Session"])
 
 @router.get("/")
-async def list_sessions():
-    """List all active session IDs"""
+async def list_sessions(
+    page_size: int = Query(50, ge=1, le=500),
+    page_token: Optional[str] = None,
+    session_service: SessionService = Depends(get_session_service)
+):
+    """List active sessions, one page at a time"""
     try:
-        sessions = session_service.list_active_sessions()
+        page = session_service.list_active_sessions(page_size, page_token)
         return {
-            "active_sessions": sessions,
-            "count": len(sessions)
+            "active_sessions": [s["session_id"] for s in page["sessions"]],
+            "sessions": page["sessions"],
+            "count": len(page["sessions"]),
+            "next_page_token": page["next_page_token"]
         }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error listing sessions: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/stats")
+async def session_cache_stats(session_service: SessionService = Depends(get_session_service)):
+    """Get session cache metrics"""
+    return session_service.get_stats()
+
 @router.get("/{session_id}/history")
-async def get_session_history(session_id: str):
+async def get_session_history(
+    session_id: str,
+    session_service: SessionService = Depends(get_session_service)
+):
     """Get conversation history for a session"""
     try:
         history = session_service.get_session_history(session_id)
@@ -36,7 +53,10 @@ async def get_session_history(session_id: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.delete("/{session_id}")
-async def clear_session(session_id: str):
+async def clear_session(
+    session_id: str,
+    session_service: SessionService = Depends(get_session_service)
+):
     """Clear conversation history for a session"""
     try:
         session_service.clear_session(session_id)
@@ -49,7 +69,10 @@ async def clear_session(session_id: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/{session_id}/export")
-async def export_session(session_id: str):
+async def export_session(
+    session_id: str,
+    session_service: SessionService = Depends(get_session_service)
+):
     """Export session history"""
     try:
         export_data = session_service.export_session(session_id)
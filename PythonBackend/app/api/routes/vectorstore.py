@@ -0,0 +1,28 @@
+from fastapi import APIRouter, Depends, HTTPException
+from app.services.vectorstore_service import VectorStoreService, get_vectorstore_service
+import logging
+
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/vectorstore", tags=["Vectorstore"])
+
+@router.post("/sync", status_code=202)
+async def sync_vectorstore(vectorstore_service: VectorStoreService = Depends(get_vectorstore_service)):
+    """Start embedding new or changed files from the data directory in the background"""
+    started = vectorstore_service.start_background_sync()
+    if not started:
+        raise HTTPException(status_code=409, detail="A vectorstore sync is already running")
+    return {"status": "accepted", "ingestion": vectorstore_service.get_ingestion_status()}
+
+@router.get("/ingestion")
+async def ingestion_status(vectorstore_service: VectorStoreService = Depends(get_vectorstore_service)):
+    """Get background ingestion state and progress"""
+    return vectorstore_service.get_ingestion_status()
+
+@router.get("/stats")
+async def vectorstore_stats(vectorstore_service: VectorStoreService = Depends(get_vectorstore_service)):
+    """Get vectorstore statistics"""
+    try:
+        return vectorstore_service.get_stats()
+    except Exception as e:
+        logger.error(f"Error getting vectorstore stats: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
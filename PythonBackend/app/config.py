@@ -27,16 +27,96 @@ class Settings(BaseSettings):
     vectorstore_dir: Path = project_root / "chroma_db"
     chat_vectorstore_dir: Path = project_root / "chroma_chat_db"
     pdf_vectorstore_dir: Path = project_root / "chroma_pdf_db"
+    embedding_cache_dir: Path = project_root / "embedding_cache"
     
     # Model settings
     embedding_model: str = "embed-english-v3.0"
     llm_model: str = "command-r"
     llm_temperature: float = 0.0
     
+    # Embedding cache
+    embedding_cache_enabled: bool = True
+    embedding_cache_max_entries: int = 200000
+    
     # Chunking settings
     chunk_size: int = 256
     chunk_overlap: int = 0
     
+    # Ingestion settings (None = one worker process per CPU)
+    ingest_workers: Optional[int] = None
+    
+    # Embedding scheduler (Cohere accepts up to 96 texts per embed call)
+    embedding_batch_size: int = 96
+    embedding_concurrency: int = 4
+    embedding_requests_per_minute: float = 90.0
+    embedding_max_retries: int = 6
+    embedding_backoff_base_seconds: float = 1.0
+    embedding_backoff_max_seconds: float = 60.0
+    
+    # Session cache
+    session_cache_max_size: int = 1000
+    session_idle_ttl_seconds: int = 1800
+    # Number of session_index partitions; changing it orphans existing index rows
+    session_index_buckets: int = 8
+    
+    # Chat message embedding queue
+    chat_embed_batch_size: int = 32
+    chat_embed_flush_seconds: float = 2.0
+    chat_embed_max_pending: int = 10000
+    
+    # Bulk memory saves
+    memory_batch_max_items: int = 200
+    
+    # Near-duplicate detection for saved memories (MinHash LSH)
+    memory_dedup_enabled: bool = True
+    memory_dedup_threshold: float = 0.9
+    memory_dedup_num_perm: int = 128
+    memory_dedup_bands: int = 32
+    memory_dedup_shingle_size: int = 5
+    
+    # Retrieval: candidates per store, then a score cutoff picks 1..max_k chunks
+    # by MMR. Hybrid = BM25 + vector results merged by reciprocal rank fusion.
+    retrieval_candidate_k: int = 20
+    retrieval_max_k: int = 4
+    retrieval_min_score: float = 0.25
+    retrieval_score_margin: float = 0.15
+    retrieval_mmr_lambda: float = 0.7
+    retrieval_max_context_chars: int = 3000
+    hybrid_retrieval_enabled: bool = True
+    rrf_k: int = 60
+    bm25_k1: float = 1.5
+    bm25_b: float = 0.75
+    
+    # Relevance grading of retrieved chunks (one structured LLM call per chunk, run in parallel)
+    relevance_grading_enabled: bool = True
+    grading_max_concurrency: int = 6
+    
+    # Grounding check: local lexical score bands; only scores in between go to the LLM grader
+    grounding_accept_above: float = 0.75
+    grounding_reject_below: float = 0.2
+    # Low scores are only rejected locally if the answer shares less than this share of its
+    # content words with the context; higher-overlap paraphrases go to the LLM grader
+    grounding_reject_max_overlap: float = 0.25
+    
+    # Speculative fallback: start the fallback answer alongside the LLM grader when the
+    # local grounding score is below this, for at most this share of answers
+    speculative_fallback_enabled: bool = True
+    speculative_fallback_below: float = 0.5
+    speculative_fallback_max_share: float = 0.25
+    
+    # Per-request latency budget; optional stages (relevance grading, grounding check,
+    # simplification) are skipped when less than their estimate remains
+    rag_default_timeout_seconds: float = 25.0
+    relevance_grading_min_seconds: float = 2.0
+    grounding_check_min_seconds: float = 2.0
+    simplification_min_seconds: float = 3.0
+    
+    # Semantic answer cache
+    semantic_cache_enabled: bool = True
+    semantic_cache_threshold: float = 0.95
+    semantic_cache_max_entries: int = 1000
+    semantic_cache_ttl_seconds: int = 3600
+    
     # API settings
     api_title: str = "RAG API"
     api_version: str = "1.0.0"
@@ -0,0 +1,127 @@
+from typing import Dict, List
+from langchain.schema import Document as LCDocument
+from app.core.vectorstore import get_vector_store_manager
+from app.config import get_settings
+import queue
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+class ChatEmbeddingQueue:
+    """
+    Write-behind queue that embeds chat messages off the request path.
+
+    Messages are grouped into batches of up to `batch_size` or whatever
+    arrived within `flush_interval` seconds of the first queued message.
+    Each batch is embedded with one add_documents call and persisted once.
+    """
+
+    _SENTINEL = object()
+
+    def __init__(
+        self,
+        batch_size: int = settings.chat_embed_batch_size,
+        flush_interval: float = settings.chat_embed_flush_seconds,
+        max_pending: int = settings.chat_embed_max_pending
+    ):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._stats = {"enqueued": 0, "embedded": 0, "batches": 0, "dropped": 0, "failed": 0}
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run,
+                    name="chat-embedding-queue",
+                    daemon=True
+                )
+                self._thread.start()
+
+    def enqueue(self, doc: LCDocument) -> None:
+        """Queue a chat message document for embedding"""
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(doc)
+            self._stats["enqueued"] += 1
+        except queue.Full:
+            # Embedding failure shouldn't break chat, and neither should backpressure
+            self._stats["dropped"] += 1
+            logger.warning("Chat embedding queue is full, dropping message embedding")
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is self._SENTINEL:
+                break
+
+            batch = [item]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is self._SENTINEL:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            self._write_batch(batch)
+
+        # Drain whatever is still queued at shutdown
+        remaining_docs = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not self._SENTINEL:
+                remaining_docs.append(item)
+        for i in range(0, len(remaining_docs), self.batch_size):
+            self._write_batch(remaining_docs[i:i + self.batch_size])
+
+    def _write_batch(self, batch: List[LCDocument]) -> None:
+        try:
+            chat_store = get_vector_store_manager().get_chat_store()
+            chat_store.add_documents(
+                batch,
+                ids=[doc.metadata["message_id"] for doc in batch]
+            )
+            chat_store.persist()
+            self._stats["embedded"] += len(batch)
+            self._stats["batches"] += 1
+            logger.debug(f"Embedded batch of {len(batch)} chat messages")
+        except Exception as e:
+            self._stats["failed"] += len(batch)
+            logger.error(f"Error embedding chat message batch: {e}")
+
+    def shutdown(self, timeout: float = 30.0) -> None:
+        """Flush pending messages and stop the worker thread"""
+        if self._thread is None or not self._thread.is_alive():
+            return
+        logger.info(f"Flushing {self._queue.qsize()} pending chat message embeddings")
+        # Block for the sentinel so it is never dropped on a full queue
+        self._queue.put(self._SENTINEL)
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            logger.warning("Chat embedding queue did not finish flushing before timeout")
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get queue counters"""
+        return {**self._stats, "pending": self._queue.qsize()}
+
+# Singleton instance
+chat_embedding_queue = ChatEmbeddingQueue()
@@ -0,0 +1,80 @@
+from typing import Any, Callable, Dict
+from functools import wraps
+from threading import RLock
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+class ServiceContainer:
+    """
+    Registry of lazily constructed application components.
+
+    Components are registered with the `component` decorator and built on the
+    first call to their getter, so importing a module no longer creates API
+    clients, tokenizers or vectorstores. Construction time is recorded per
+    component; it includes any dependencies built for the first time inside
+    the component's constructor.
+
+    Each component has its own construction lock, so a slow factory (an API
+    client, a vectorstore) only blocks callers of that same component.
+    """
+
+    def __init__(self):
+        self._instances: Dict[str, Any] = {}
+        self._timings: Dict[str, float] = {}
+        self._order = []
+        # Guards the registries above; never held while a factory runs
+        self._lock = RLock()
+        self._component_locks: Dict[str, RLock] = {}
+
+    def _component_lock(self, name: str) -> RLock:
+        with self._lock:
+            return self._component_locks.setdefault(name, RLock())
+
+    def component(self, name: str):
+        """Decorator turning a factory into a cached, timed getter"""
+        def decorator(factory: Callable[[], Any]) -> Callable[[], Any]:
+            @wraps(factory)
+            def getter():
+                instance = self._instances.get(name)
+                if instance is not None:
+                    return instance
+                with self._component_lock(name):
+                    if name not in self._instances:
+                        started = time.perf_counter()
+                        instance = factory()
+                        elapsed = time.perf_counter() - started
+                        with self._lock:
+                            self._instances[name] = instance
+                            self._timings[name] = elapsed
+                            self._order.append(name)
+                        logger.info(f"⏱️ Initialized {name} in {elapsed * 1000:.1f} ms")
+                    return self._instances[name]
+            return getter
+        return decorator
+
+    def record_timing(self, name: str, seconds: float) -> None:
+        """Record the duration of a startup step that is not a component"""
+        with self._lock:
+            if name not in self._timings:
+                self._order.append(name)
+            self._timings[name] = seconds
+
+    def get_if_initialized(self, name: str) -> Any:
+        """Return a component only if something already built it"""
+        return self._instances.get(name)
+
+    def get_startup_timings(self) -> Dict[str, Any]:
+        """Construction time per initialized component and startup step, in order"""
+        with self._lock:
+            return {
+                "components": [
+                    {"name": name, "init_ms": round(self._timings[name] * 1000, 1)}
+                    for name in self._order
+                ],
+                "initialized": len(self._instances)
+            }
+
+# Singleton instance
+container = ServiceContainer()
@@ -1,5 +1,6 @@
 from cassandra.cluster import Cluster
 from cassandra.query import SimpleStatement
+import asyncio
 import time
 import logging
 from app.config import get_settings
@@ -64,6 +65,30 @@ class CassandraConnection:
               AND default_time_to_live = 86400;
         """)
         logger.info("✅ Table 'chat_history' created/verified")
+        
+        # Session index, rows expire with the chat history they point to
+        self.session.execute("""
+            CREATE TABLE IF NOT EXISTS session_index (
+                bucket        int,
+                session_id    text,
+                last_activity timestamp,
+                PRIMARY KEY ((bucket), session_id)
+            ) WITH default_time_to_live = 86400;
+        """)
+        logger.info("✅ Table 'session_index' created/verified")
+        
+        # Counter tables cannot hold other columns or a TTL
+        self.session.execute("""
+            CREATE TABLE IF NOT EXISTS session_message_counts (
+                session_id    text PRIMARY KEY,
+                message_count counter
+            );
+        """)
+        logger.info("✅ Table 'session_message_counts' created/verified")
+    
+    @property
+    def is_connected(self) -> bool:
+        return self._connected
     
     def get_session(self):
         if not self._connected:
@@ -74,5 +99,25 @@ class CassandraConnection:
         if self.cluster:
             self.cluster.shutdown()
 
+async def aexecute(session, query, parameters=None):
+    """Run a statement through the driver's execute_async without blocking the event loop"""
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+
+    def _set_result(rows):
+        if not future.done():
+            future.set_result(rows)
+
+    def _set_exception(exc):
+        if not future.done():
+            future.set_exception(exc)
+
+    response_future = session.execute_async(query, parameters)
+    response_future.add_callbacks(
+        callback=lambda rows: loop.call_soon_threadsafe(_set_result, rows),
+        errback=lambda exc: loop.call_soon_threadsafe(_set_exception, exc)
+    )
+    return await future
+
 # Singleton instance
 cassandra_conn = CassandraConnection()
\ No newline at end of file
@@ -0,0 +1,58 @@
+from typing import Any, Awaitable, List, Optional
+import asyncio
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+class Deadline:
+    """
+    Latency budget of a single request, shared by every pipeline stage.
+
+    Optional stages ask `allows` before starting; optional and required
+    stages alike are bounded by the remaining budget through `run`, which
+    falls back to a default when it runs out. Both record the stage in
+    `skipped`, so the response can report what was left out or cut short.
+    """
+
+    def __init__(self, seconds: float):
+        self.budget = seconds
+        self.started_at = time.monotonic()
+        self.expires_at = self.started_at + seconds
+        self.skipped: List[str] = []
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started_at
+
+    def skip(self, stage: str, reason: str) -> None:
+        if stage not in self.skipped:
+            self.skipped.append(stage)
+        logger.info(f"⏭️ Skipping {stage}: {reason}")
+
+    def allows(self, stage: str, min_seconds: float) -> bool:
+        """True if at least `min_seconds` remain for an optional stage"""
+        remaining = self.remaining()
+        if remaining < min_seconds:
+            self.skip(stage, f"{remaining:.1f}s left of {self.budget:.1f}s budget")
+            return False
+        return True
+
+    async def run(self, stage: str, awaitable: Awaitable, default: Any = None) -> Any:
+        """
+        Await an optional stage, giving up with `default` when the budget runs out.
+
+        With no budget left the stage is cancelled before it starts, so
+        anything that must always run belongs outside this call.
+        """
+        try:
+            return await asyncio.wait_for(awaitable, timeout=self.remaining())
+        except asyncio.TimeoutError:
+            self.skip(stage, f"budget of {self.budget:.1f}s ran out")
+            return default
+
+    @classmethod
+    def from_millis(cls, millis: Optional[int], default_seconds: float) -> "Deadline":
+        return cls(millis / 1000 if millis else default_seconds)
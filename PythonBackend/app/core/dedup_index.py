@@ -0,0 +1,187 @@
+from typing import Any, Dict, List, Optional, Tuple
+from collections import defaultdict
+from pathlib import Path
+from threading import Lock
+import hashlib
+import re
+import numpy as np
+from app.config import get_settings
+from app.core.container import container
+from app.core.record_log import RecordLog
+import logging
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Mersenne prime 2^31 - 1 keeps a * x + b within uint64 for 31-bit hashes
+_PRIME = np.uint64((1 << 31) - 1)
+_TOKEN = re.compile(r"\w+")
+
+class NearDuplicateIndex:
+    """
+    MinHash + LSH index of saved pages, keyed by source URL.
+
+    Pages are reduced to word shingles and a MinHash signature whose matching
+    fraction estimates Jaccard similarity. Signatures are split into bands so
+    only pages sharing at least one band bucket are compared. Entries are
+    appended to a JSONL log and replayed on startup.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        threshold: float = settings.memory_dedup_threshold,
+        num_perm: int = settings.memory_dedup_num_perm,
+        bands: int = settings.memory_dedup_bands,
+        shingle_size: int = settings.memory_dedup_shingle_size
+    ):
+        if num_perm % bands:
+            raise ValueError("memory_dedup_num_perm must be a multiple of memory_dedup_bands")
+        self._log = RecordLog(path, "near-duplicate index")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+
+        # Fixed seed so signatures stay comparable across restarts
+        rng = np.random.RandomState(1)
+        self._a = rng.randint(1, int(_PRIME), size=num_perm).astype(np.uint64)
+        self._b = rng.randint(0, int(_PRIME), size=num_perm).astype(np.uint64)
+
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._buckets: Dict[Tuple[int, int], set] = defaultdict(set)
+        self._lock = Lock()
+        self._stats = {"checked": 0, "suppressed": 0}
+        self._load()
+
+    def _shingles(self, text: str) -> List[str]:
+        words = _TOKEN.findall(text.lower())
+        if len(words) <= self.shingle_size:
+            return [" ".join(words)] if words else []
+        return [
+            " ".join(words[i:i + self.shingle_size])
+            for i in range(len(words) - self.shingle_size + 1)
+        ]
+
+    def signature(self, text: str) -> Optional[List[int]]:
+        """MinHash signature of a text, or None if it has no words"""
+        shingles = set(self._shingles(text))
+        if not shingles:
+            return None
+        hashes = np.array(
+            [
+                int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=4).digest(), "little")
+                for s in shingles
+            ],
+            dtype=np.uint64
+        ) % _PRIME
+        permuted = (np.outer(hashes, self._a) + self._b) % _PRIME
+        return permuted.min(axis=0).astype(np.int64).tolist()
+
+    @staticmethod
+    def similarity(first: List[int], second: List[int]) -> float:
+        """Estimated Jaccard similarity of two signatures"""
+        return float(np.mean(np.asarray(first) == np.asarray(second)))
+
+    def _band_keys(self, signature: List[int]) -> List[Tuple[int, int]]:
+        return [
+            (band, hash(tuple(signature[band * self.rows:(band + 1) * self.rows])))
+            for band in range(self.bands)
+        ]
+
+    def find_duplicate(
+        self,
+        signature: Optional[List[int]],
+        exclude_source: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Find the most similar saved page above the threshold.
+
+        Returns:
+            {"source", "title", "similarity"} of the best match, or None
+        """
+        if signature is None:
+            return None
+        with self._lock:
+            self._stats["checked"] += 1
+            candidates = set()
+            for key in self._band_keys(signature):
+                candidates.update(self._buckets.get(key, ()))
+            candidates.discard(exclude_source)
+
+            best = None
+            for source in candidates:
+                entry = self._entries[source]
+                similarity = self.similarity(entry["signature"], signature)
+                if similarity >= self.threshold and (best is None or similarity > best["similarity"]):
+                    best = {"source": source, "title": entry["title"], "similarity": round(similarity, 3)}
+            if best is not None:
+                self._stats["suppressed"] += 1
+            return best
+
+    def record_suppressed(self) -> None:
+        """Count a duplicate that was detected outside the index"""
+        with self._lock:
+            self._stats["suppressed"] += 1
+
+    def _index(self, source: str, title: str, signature: List[int]) -> None:
+        self._unindex(source)
+        self._entries[source] = {"title": title, "signature": signature}
+        for key in self._band_keys(signature):
+            self._buckets[key].add(source)
+
+    def _unindex(self, source: str) -> None:
+        entry = self._entries.pop(source, None)
+        if entry is None:
+            return
+        for key in self._band_keys(entry["signature"]):
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.discard(source)
+                if not bucket:
+                    del self._buckets[key]
+
+    def add(self, source: str, title: str, signature: Optional[List[int]]) -> None:
+        """Index a saved page, replacing any earlier signature for the same URL"""
+        if signature is None:
+            return
+        with self._lock:
+            self._index(source, title, signature)
+            self._log.append([{"op": "add", "source": source, "title": title, "signature": signature}])
+
+    def remove(self, source: str) -> None:
+        """Forget a page, e.g. after its chunks were deleted"""
+        with self._lock:
+            if source in self._entries:
+                self._unindex(source)
+                self._log.append([{"op": "remove", "source": source}])
+
+    def _replay(self, record: Dict[str, Any]) -> None:
+        if record["op"] == "add" and len(record["signature"]) == self.num_perm:
+            self._index(record["source"], record["title"], record["signature"])
+        elif record["op"] == "remove":
+            self._unindex(record["source"])
+
+    def _load(self) -> None:
+        self._log.load(
+            self._replay,
+            lambda: [{"op": "add", "source": source, **entry} for source, entry in self._entries.items()]
+        )
+        logger.info(f"Loaded near-duplicate index with {len(self._entries)} pages")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get index size and suppression counters"""
+        with self._lock:
+            return {
+                **self._stats,
+                "pages": len(self._entries),
+                "threshold": self.threshold,
+                "num_perm": self.num_perm,
+                "bands": self.bands
+            }
+
+@container.component("dedup_index")
+def get_dedup_index() -> NearDuplicateIndex:
+    """Get the shared NearDuplicateIndex, constructed on first use"""
+    return NearDuplicateIndex(settings.vectorstore_dir / "dedup_index.jsonl")
@@ -0,0 +1,164 @@
+from typing import Any, Callable, Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from langchain.schema import Document
+from langchain_core.embeddings import Embeddings
+from app.config import get_settings
+import random
+import re
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+_RETRYABLE_MESSAGE = re.compile(
+    r"\b(429|5\d\d)\b|rate.?limit|too many requests|timed? ?out|temporarily unavailable|connection",
+    re.IGNORECASE
+)
+
+def is_retryable_error(error: Exception) -> bool:
+    """True for rate limiting (429), server errors (5xx) and transient network errors"""
+    status = getattr(error, "status_code", None)
+    if status is None:
+        response = getattr(error, "response", None)
+        status = getattr(response, "status_code", None)
+    if isinstance(status, int):
+        return status == 429 or 500 <= status < 600
+    return bool(_RETRYABLE_MESSAGE.search(f"{type(error).__name__} {error}"))
+
+
+class TokenBucket:
+    """Thread-safe token bucket limiting how often requests are sent"""
+
+    def __init__(self, rate_per_second: float, capacity: float):
+        self.rate = rate_per_second
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = Lock()
+
+    def acquire(self, tokens: float = 1.0) -> None:
+        """Block until `tokens` are available, then take them"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class EmbeddingScheduler:
+    """
+    Embeds documents in provider-sized batches with bounded concurrency.
+
+    Requests are paced by a token bucket. Rate-limit and server errors are
+    retried with exponential backoff and full jitter; batches that still fail
+    are reported by chunk id instead of aborting the run.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        concurrency: int = settings.embedding_concurrency,
+        requests_per_minute: float = settings.embedding_requests_per_minute,
+        batch_size: int = settings.embedding_batch_size,
+        max_retries: int = settings.embedding_max_retries,
+        backoff_base: float = settings.embedding_backoff_base_seconds,
+        backoff_max: float = settings.embedding_backoff_max_seconds
+    ):
+        self.embeddings = embeddings
+        self.concurrency = max(1, concurrency)
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._bucket = TokenBucket(requests_per_minute / 60.0, capacity=self.concurrency)
+
+    def _backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _embed_batch(self, texts: List[str], batch_num: int, total_batches: int):
+        """Embed one batch, retrying transient errors. Returns (vectors, retries)"""
+        attempt = 0
+        while True:
+            self._bucket.acquire()
+            try:
+                return self.embeddings.embed_documents(texts), attempt
+            except Exception as e:
+                if attempt >= self.max_retries or not is_retryable_error(e):
+                    raise
+                delay = self._backoff(attempt)
+                attempt += 1
+                logger.warning(
+                    f"Batch {batch_num}/{total_batches} failed ({e}), "
+                    f"retry {attempt}/{self.max_retries} in {delay:.1f}s"
+                )
+                time.sleep(delay)
+
+    def run(
+        self,
+        docs: List[Document],
+        ids: List[str],
+        store_batch: Callable[[List[Document], List[str], List[List[float]]], None],
+        on_batch_done: Optional[Callable[[List[str]], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        Embed documents and hand each embedded batch to `store_batch`.
+
+        Args:
+            docs: Documents to embed
+            ids: Chunk id for each document
+            store_batch: Called with (docs, ids, vectors) for every embedded batch
+            on_batch_done: Called with the batch ids once a batch has been stored
+
+        Returns:
+            Report with counts, retries, throughput and the ids that failed
+        """
+        started = time.perf_counter()
+        batches = [
+            (docs[i:i + self.batch_size], ids[i:i + self.batch_size])
+            for i in range(0, len(docs), self.batch_size)
+        ]
+        total_batches = len(batches)
+        report = {"embedded": 0, "failed_ids": [], "batches": total_batches, "retries": 0}
+        report_lock = Lock()
+
+        def process(batch_num: int, batch_docs: List[Document], batch_ids: List[str]) -> None:
+            try:
+                vectors, retries = self._embed_batch(
+                    [doc.page_content for doc in batch_docs], batch_num, total_batches
+                )
+                store_batch(batch_docs, batch_ids, vectors)
+                if on_batch_done is not None:
+                    on_batch_done(batch_ids)
+                with report_lock:
+                    report["embedded"] += len(batch_ids)
+                    report["retries"] += retries
+                logger.info(f"✅ Embedded batch {batch_num}/{total_batches}")
+            except Exception as e:
+                logger.error(f"Failed to embed batch {batch_num}/{total_batches}: {e}")
+                with report_lock:
+                    report["failed_ids"].extend(batch_ids)
+
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="embedding") as executor:
+            futures = [
+                executor.submit(process, num, batch_docs, batch_ids)
+                for num, (batch_docs, batch_ids) in enumerate(batches, start=1)
+            ]
+            for future in futures:
+                future.result()
+
+        elapsed = max(time.perf_counter() - started, 1e-9)
+        report["seconds"] = round(elapsed, 3)
+        report["chunks_per_second"] = round(report["embedded"] / elapsed, 2)
+        logger.info(
+            f"📊 Embedded {report['embedded']}/{len(docs)} chunks in {elapsed:.1f}s "
+            f"({report['chunks_per_second']} chunks/s, {report['retries']} retries, "
+            f"{len(report['failed_ids'])} failed)"
+        )
+        return report
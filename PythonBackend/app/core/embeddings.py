@@ -1,13 +1,217 @@
+from typing import Dict, Iterable, List
+from array import array
+from pathlib import Path
+from threading import Lock
+import asyncio
+import hashlib
+import sqlite3
+import time
+from langchain_core.embeddings import Embeddings
 from langchain_cohere import CohereEmbeddings
 from app.config import get_settings
 from functools import lru_cache
+import logging
 
+logger = logging.getLogger(__name__)
 settings = get_settings()
 
+class EmbeddingCacheStore:
+    """
+    On-disk SQLite store of embedding vectors with LRU eviction by entry count.
+
+    Reads only note which keys were used; the last-used times are written
+    with the next batch of vectors, so lookups never commit. The row count is
+    kept in memory, so eviction is exact for a single process and approximate
+    when several processes share the file.
+    """
+
+    # SQLite caps the number of bound parameters per statement
+    _MAX_PARAMS = 500
+
+    def __init__(self, path: Path, max_entries: int):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self._lock = Lock()
+        self._touched: Dict[str, float] = {}
+        self._conn = sqlite3.connect(str(path), check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS embeddings (
+                key       TEXT PRIMARY KEY,
+                vector    BLOB NOT NULL,
+                last_used REAL NOT NULL
+            )
+        """)
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings (last_used)"
+        )
+        self._conn.commit()
+        self._count = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    @staticmethod
+    def _chunks(items: List[str], size: int) -> Iterable[List[str]]:
+        for i in range(0, len(items), size):
+            yield items[i:i + size]
+
+    def get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        """Fetch cached vectors and note their last-used time"""
+        found = {}
+        now = time.time()
+        with self._lock:
+            for chunk in self._chunks(list(keys), self._MAX_PARAMS):
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                    chunk
+                ).fetchall()
+                for key, blob in rows:
+                    vector = array("f")
+                    vector.frombytes(blob)
+                    found[key] = vector.tolist()
+                    self._touched[key] = now
+        return found
+
+    def _existing(self, keys: List[str]) -> int:
+        existing = 0
+        for chunk in self._chunks(keys, self._MAX_PARAMS):
+            placeholders = ",".join("?" * len(chunk))
+            existing += self._conn.execute(
+                f"SELECT COUNT(*) FROM embeddings WHERE key IN ({placeholders})",
+                chunk
+            ).fetchone()[0]
+        return existing
+
+    def set_many(self, items: Dict[str, List[float]]) -> None:
+        """Store vectors, evicting the least recently used entries past max_entries"""
+        if not items:
+            return
+        now = time.time()
+        with self._lock:
+            if self._touched:
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                    [(used, key) for key, used in self._touched.items()]
+                )
+                self._touched.clear()
+            new_entries = len(items) - self._existing(list(items))
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)",
+                [(key, array("f", vector).tobytes(), now) for key, vector in items.items()]
+            )
+            self._count += new_entries
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        overflow = self._count - self.max_entries
+        if overflow > 0:
+            deleted = self._conn.execute(
+                "DELETE FROM embeddings WHERE key IN "
+                "(SELECT key FROM embeddings ORDER BY last_used ASC LIMIT ?)",
+                (overflow,)
+            ).rowcount
+            self._count -= deleted
+            logger.info(f"Evicted {deleted} entries from embedding cache")
+
+    def count(self) -> int:
+        with self._lock:
+            return self._count
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper that only sends texts it has not embedded before.
+
+    Vectors are keyed by (namespace, input kind, sha256 of the text); documents
+    and queries are cached separately because Cohere embeds them with different
+    input types.
+    """
+
+    def __init__(self, underlying: Embeddings, store: EmbeddingCacheStore, namespace: str):
+        self.underlying = underlying
+        self.store = store
+        self.namespace = namespace
+        self._stats_lock = Lock()
+        self._stats = {"hits": 0, "misses": 0}
+
+    def _key(self, kind: str, text: str) -> str:
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        return f"{self.namespace}:{kind}:{digest}"
+
+    def _record(self, hits: int, misses: int) -> None:
+        with self._stats_lock:
+            self._stats["hits"] += hits
+            self._stats["misses"] += misses
+
+    def _plan(self, kind: str, texts: List[str]):
+        """Split texts into cached vectors and unique texts still to embed"""
+        keys = [self._key(kind, text) for text in texts]
+        cached = self.store.get_many(list(set(keys)))
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in cached:
+                missing.setdefault(key, text)
+        self._record(len(texts) - len(missing), len(missing))
+        return keys, cached, missing
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys, cached, missing = self._plan("document", texts)
+        if missing:
+            vectors = self.underlying.embed_documents(list(missing.values()))
+            fresh = dict(zip(missing.keys(), vectors))
+            self.store.set_many(fresh)
+            cached.update(fresh)
+        return [cached[key] for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        keys, cached, missing = self._plan("query", [text])
+        if missing:
+            vector = self.underlying.embed_query(text)
+            self.store.set_many({keys[0]: vector})
+            return vector
+        return cached[keys[0]]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys, cached, missing = await asyncio.to_thread(self._plan, "document", texts)
+        if missing:
+            vectors = await self.underlying.aembed_documents(list(missing.values()))
+            fresh = dict(zip(missing.keys(), vectors))
+            await asyncio.to_thread(self.store.set_many, fresh)
+            cached.update(fresh)
+        return [cached[key] for key in keys]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        keys, cached, missing = await asyncio.to_thread(self._plan, "query", [text])
+        if missing:
+            vector = await self.underlying.aembed_query(text)
+            await asyncio.to_thread(self.store.set_many, {keys[0]: vector})
+            return vector
+        return cached[keys[0]]
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get cache hit/miss counters and current size"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["size"] = self.store.count()
+        stats["max_entries"] = self.store.max_entries
+        return stats
+
+
 @lru_cache()
 def get_embeddings():
     """Get cached embeddings instance"""
-    return CohereEmbeddings(
+    embeddings = CohereEmbeddings(
         model=settings.embedding_model,
         cohere_api_key=settings.cohere_api_key
-    )
\ No newline at end of file
+    )
+    if not settings.embedding_cache_enabled:
+        return embeddings
+
+    return CachedEmbeddings(
+        underlying=embeddings,
+        store=EmbeddingCacheStore(
+            settings.embedding_cache_dir / "embeddings.sqlite3",
+            settings.embedding_cache_max_entries
+        ),
+        namespace=settings.embedding_model
+    )
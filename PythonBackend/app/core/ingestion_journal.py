@@ -0,0 +1,131 @@
+from typing import Any, Dict, List, Optional, Set
+from datetime import datetime
+from pathlib import Path
+from threading import Lock
+from uuid import uuid4
+import json
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+class IngestionJournal:
+    """
+    Durable, append-only journal of an ingestion job's progress.
+
+    Every stored batch appends its chunk ids and is fsynced before the next
+    one is recorded, so after a crash the job can resume with exactly the
+    chunks that had already landed. The file only holds the current job: it
+    is rewritten when a new job starts after the previous one completed.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = Lock()
+        self._file = None
+        self.job_id: Optional[str] = None
+        self.done_ids: Set[str] = set()
+        self.completed = True
+        self.started_at: Optional[str] = None
+        self.planned = 0
+        self._load()
+
+    def _load(self) -> None:
+        """Replay the journal file, ignoring a torn final line"""
+        if not self.path.exists():
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning("Ignoring incomplete ingestion journal record")
+                    continue
+                if record["type"] == "job_started":
+                    self.job_id = record["job_id"]
+                    self.started_at = record["started_at"]
+                    self.planned = record.get("planned", 0)
+                    self.done_ids = set()
+                    self.completed = False
+                elif record["type"] == "batch_done" and record["job_id"] == self.job_id:
+                    self.done_ids.update(record["ids"])
+                elif record["type"] == "job_planned" and record["job_id"] == self.job_id:
+                    self.planned = record["planned"]
+                elif record["type"] == "job_completed" and record["job_id"] == self.job_id:
+                    self.completed = True
+
+    def _append(self, record: Dict[str, Any]) -> None:
+        self._file.write(json.dumps(record) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    @property
+    def resumable(self) -> bool:
+        """True if the last job was interrupted before completing"""
+        return self.job_id is not None and not self.completed
+
+    def begin(self) -> Set[str]:
+        """
+        Start a new job, or resume the interrupted one.
+
+        Returns:
+            Chunk ids already stored by the resumed job (empty for a new job)
+        """
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            if self.resumable:
+                logger.info(
+                    f"⏯️ Resuming ingestion job {self.job_id} "
+                    f"({len(self.done_ids)} chunks already embedded)"
+                )
+                self._file = open(self.path, "a", encoding="utf-8")
+                return set(self.done_ids)
+
+            self.job_id = str(uuid4())
+            self.started_at = datetime.utcnow().isoformat()
+            self.done_ids = set()
+            self.completed = False
+            self.planned = 0
+            self._file = open(self.path, "w", encoding="utf-8")
+            self._append({"type": "job_started", "job_id": self.job_id, "started_at": self.started_at})
+            return set()
+
+    def record_plan(self, planned: int) -> None:
+        """Record how many chunks the job has to store in total"""
+        with self._lock:
+            self.planned = planned
+            self._append({"type": "job_planned", "job_id": self.job_id, "planned": planned})
+
+    def record_batch(self, ids: List[str]) -> None:
+        """Durably record that a batch of chunks has landed in the vectorstore"""
+        with self._lock:
+            self._append({"type": "batch_done", "job_id": self.job_id, "ids": list(ids)})
+            self.done_ids.update(ids)
+
+    def complete(self) -> None:
+        """Mark the job complete; only call once every planned chunk has landed"""
+        with self._lock:
+            self._append({"type": "job_completed", "job_id": self.job_id})
+            self.completed = True
+            self._close()
+
+    def suspend(self) -> None:
+        """Close the journal leaving the job resumable"""
+        with self._lock:
+            self._close()
+
+    def _close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def status(self) -> Dict[str, Any]:
+        """Get the current job's progress"""
+        with self._lock:
+            return {
+                "job_id": self.job_id,
+                "started_at": self.started_at,
+                "completed": self.completed,
+                "planned_chunks": self.planned,
+                "done_chunks": len(self.done_ids)
+            }
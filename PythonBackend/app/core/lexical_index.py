@@ -0,0 +1,165 @@
+from typing import Any, Dict, List, Sequence, Set, Tuple
+from collections import Counter, defaultdict
+from pathlib import Path
+from threading import Lock
+import heapq
+import math
+import re
+from app.config import get_settings
+from app.core.container import container
+from app.core.record_log import RecordLog
+import logging
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Keeps clause and standard identifiers such as "l1a", "12056-2" or "7.3.1" whole
+_TOKEN = re.compile(r"[a-z0-9]+(?:[.\-/][a-z0-9]+)*")
+_SEPARATOR = re.compile(r"[.\-/]")
+# A digit plus a letter or separator ("l1a", "7.3.1"), or a long number ("12056"); not "30"
+_IDENTIFIER = re.compile(r"(?=.*\d)(?:.*[a-z.\-/]|\d{3,})")
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the this "
+    "to was were what when where which who will with".split()
+)
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens; compound identifiers are also indexed by their parts"""
+    tokens = []
+    for token in _TOKEN.findall(text.lower()):
+        if token in _STOPWORDS:
+            continue
+        tokens.append(token)
+        if _SEPARATOR.search(token):
+            tokens.extend(part for part in _SEPARATOR.split(token) if part)
+    return tokens
+
+def identifiers(text: str) -> Set[str]:
+    """Tokens naming a clause, part or standard (e.g. "l1a", "12056-2", "7.3.1") in a text"""
+    return {token for token in _TOKEN.findall(text.lower()) if _IDENTIFIER.match(token)}
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[Sequence[str]],
+    k: int = settings.rrf_k
+) -> List[Tuple[str, float]]:
+    """Merge ranked id lists by summing 1 / (k + rank); returns (id, score) best first"""
+    scores: Dict[str, float] = defaultdict(float)
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] += 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+class BM25Index:
+    """
+    Okapi BM25 inverted index over the main store's chunks, keyed by chunk id.
+
+    Chunk term frequencies are appended to a JSONL log as chunks are stored
+    or deleted, and replayed into in-memory postings on startup.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        k1: float = settings.bm25_k1,
+        b: float = settings.bm25_b
+    ):
+        self._log = RecordLog(path, "lexical index")
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[str, int]] = defaultdict(dict)
+        self._doc_terms: Dict[str, Dict[str, int]] = {}
+        self._doc_lengths: Dict[str, int] = {}
+        self._total_length = 0
+        self._lock = Lock()
+        self._load()
+
+    def _index(self, doc_id: str, term_freqs: Dict[str, int]) -> None:
+        self._unindex(doc_id)
+        self._doc_terms[doc_id] = term_freqs
+        length = sum(term_freqs.values())
+        self._doc_lengths[doc_id] = length
+        self._total_length += length
+        for term, freq in term_freqs.items():
+            self._postings[term][doc_id] = freq
+
+    def _unindex(self, doc_id: str) -> None:
+        term_freqs = self._doc_terms.pop(doc_id, None)
+        if term_freqs is None:
+            return
+        self._total_length -= self._doc_lengths.pop(doc_id)
+        for term in term_freqs:
+            posting = self._postings.get(term)
+            if posting is not None:
+                posting.pop(doc_id, None)
+                if not posting:
+                    del self._postings[term]
+
+    def add_many(self, ids: List[str], texts: List[str]) -> None:
+        """Index chunks, replacing earlier versions with the same id"""
+        records = []
+        with self._lock:
+            for doc_id, text in zip(ids, texts):
+                term_freqs = dict(Counter(tokenize(text)))
+                self._index(doc_id, term_freqs)
+                records.append({"op": "add", "id": doc_id, "tf": term_freqs})
+            self._log.append(records)
+
+    def remove_many(self, ids: List[str]) -> None:
+        """Drop chunks from the index"""
+        with self._lock:
+            removed = [doc_id for doc_id in ids if doc_id in self._doc_terms]
+            for doc_id in removed:
+                self._unindex(doc_id)
+            self._log.append([{"op": "remove", "id": doc_id} for doc_id in removed])
+
+    def search(self, query: str, k: int) -> List[Tuple[str, float]]:
+        """Top-k (chunk id, BM25 score) pairs for a query"""
+        terms = set(tokenize(query))
+        with self._lock:
+            total_docs = len(self._doc_lengths)
+            if not total_docs or not terms:
+                return []
+            avg_length = self._total_length / total_docs
+            scores: Dict[str, float] = defaultdict(float)
+            for term in terms:
+                posting = self._postings.get(term)
+                if not posting:
+                    continue
+                idf = math.log(1 + (total_docs - len(posting) + 0.5) / (len(posting) + 0.5))
+                for doc_id, freq in posting.items():
+                    norm = self.k1 * (1 - self.b + self.b * self._doc_lengths[doc_id] / avg_length)
+                    scores[doc_id] += idf * freq * (self.k1 + 1) / (freq + norm)
+            return heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+
+    def count(self) -> int:
+        with self._lock:
+            return len(self._doc_lengths)
+
+    def _replay(self, record: Dict[str, Any]) -> None:
+        if record["op"] == "add":
+            self._index(record["id"], record["tf"])
+        elif record["op"] == "remove":
+            self._unindex(record["id"])
+
+    def _load(self) -> None:
+        self._log.load(
+            self._replay,
+            lambda: [{"op": "add", "id": doc_id, "tf": tf} for doc_id, tf in self._doc_terms.items()]
+        )
+        logger.info(f"Loaded lexical index with {len(self._doc_terms)} chunks")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get index size"""
+        with self._lock:
+            return {
+                "chunks": len(self._doc_lengths),
+                "terms": len(self._postings),
+                "avg_chunk_length": round(self._total_length / len(self._doc_lengths), 1)
+                if self._doc_lengths else 0.0
+            }
+
+@container.component("lexical_index")
+def get_lexical_index() -> BM25Index:
+    """Get the shared BM25Index, constructed on first use"""
+    return BM25Index(settings.vectorstore_dir / "lexical_index.jsonl")
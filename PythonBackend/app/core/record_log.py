@@ -0,0 +1,56 @@
+from typing import Any, Callable, Dict, Iterable, List
+from pathlib import Path
+import json
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+class RecordLog:
+    """
+    Append-only JSONL log backing an in-memory index.
+
+    The index appends a record per change and replays the log on startup;
+    a torn final line left by a crash is skipped. When most records have
+    been superseded, the log is rewritten from the index's live entries.
+    """
+
+    def __init__(self, path: Path, name: str):
+        self.path = path
+        self.name = name
+
+    def append(self, records: List[Dict[str, Any]]) -> None:
+        if not records:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(record) + "\n" for record in records))
+
+    def load(
+        self,
+        apply: Callable[[Dict[str, Any]], None],
+        snapshot: Callable[[], List[Dict[str, Any]]]
+    ) -> None:
+        """Replay the log through `apply`, then compact it if it holds mostly superseded records"""
+        if not self.path.exists():
+            return
+        records = 0
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning(f"Ignoring incomplete {self.name} record")
+                    continue
+                records += 1
+                apply(record)
+        live = snapshot()
+        if records > 2 * len(live):
+            self._compact(live)
+
+    def _compact(self, records: Iterable[Dict[str, Any]]) -> None:
+        tmp_path = self.path.with_suffix(".jsonl.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record) + "\n")
+        os.replace(tmp_path, self.path)
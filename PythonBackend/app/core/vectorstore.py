@@ -1,6 +1,10 @@
+from pathlib import Path
+from uuid import uuid4
 from langchain_community.vectorstores import Chroma
 from app.config import get_settings
 from app.core.embeddings import get_embeddings
+from app.core.container import container
+import os
 import logging
 
 logger = logging.getLogger(__name__)
@@ -8,9 +12,13 @@ settings = get_settings()
 
 class VectorStoreManager:
     def __init__(self):
-        self.embeddings = get_embeddings()
         self._stores = {}
     
+    @property
+    def embeddings(self):
+        """Embedding client, created on first use"""
+        return get_embeddings()
+    
     def get_main_store(self):
         """Get main document vectorstore"""
         if "main" not in self._stores:
@@ -38,6 +46,32 @@ class VectorStoreManager:
             )
         return self._stores["pdf"]
     
+    @staticmethod
+    def _version_path(store_type: str) -> Path:
+        return settings.vectorstore_dir / f"{store_type}_version"
+    
+    def get_version(self, store_type: str = "main") -> str:
+        """
+        Get the version token of a vectorstore.
+        
+        The token is kept in a file next to the stores, so a change made by
+        any worker process is seen by all of them.
+        """
+        try:
+            return self._version_path(store_type).read_text(encoding="utf-8").strip()
+        except FileNotFoundError:
+            return ""
+    
+    def bump_version(self, store_type: str = "main") -> str:
+        """Mark a vectorstore as changed so dependent caches can invalidate"""
+        version = uuid4().hex
+        path = self._version_path(store_type)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp_path.write_text(version, encoding="utf-8")
+        os.replace(tmp_path, path)
+        return version
+    
     def check_store_exists(self, store_type: str = "main") -> bool:
         """Check if vectorstore exists and has documents"""
         try:
@@ -50,5 +84,7 @@ class VectorStoreManager:
             logger.error(f"Error checking {store_type} store: {e}")
             return False
 
-# Singleton instance
-vector_store_manager = VectorStoreManager()
\ No newline at end of file
+@container.component("vector_store_manager")
+def get_vector_store_manager() -> VectorStoreManager:
+    """Get the shared VectorStoreManager, constructed on first use"""
+    return VectorStoreManager()
\ No newline at end of file
@@ -1,10 +1,13 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.config import get_settings
-from app.api.routes import memory, rag, session, health
+from app.api.routes import memory, rag, session, health, vectorstore
+from app.core.container import container
 from app.core.database import cassandra_conn
-from app.services.vectorstore_service import vectorstore_service
+from app.core.chat_embedding_queue import chat_embedding_queue
+from app.services.vectorstore_service import get_vectorstore_service
 import logging
+import time
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -31,6 +34,7 @@ app.include_router(memory.router)
 app.include_router(rag.router)
 app.include_router(session.router)
 app.include_router(health.router)
+app.include_router(vectorstore.router)
 
 @app.on_event("startup")
 async def startup_event():
@@ -38,22 +42,21 @@ async def startup_event():
     logger.info("🚀 Starting up RAG application...")
     
     # Connect to Cassandra
+    started = time.perf_counter()
     cassandra_conn.connect()
+    container.record_timing("cassandra_connect", time.perf_counter() - started)
     
-    # Check/setup vectorstore
-    if vectorstore_service.check_vectorstore_exists():
-        logger.info("✅ Vectorstore already exists and has documents")
-    else:
-        logger.info("🔄 Setting up vectorstore...")
-        success = vectorstore_service.setup_vectorstore()
-        if not success:
-            logger.warning("⚠️ Failed to setup vectorstore!")
+    # Sync vectorstore in the background so health checks are served meanwhile;
+    # /health/ready and /rag report 503 until the main store has documents
+    get_vectorstore_service().start_background_sync()
+    logger.info("🔄 Vectorstore sync started in the background")
     
     logger.info("🎉 RAG application startup completed!")
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Cleanup on shutdown"""
+    chat_embedding_queue.shutdown()
     cassandra_conn.close()
 
 if __name__ == "__main__":
@@ -1,22 +1,66 @@
 import os
-from typing import List
+import asyncio
+from typing import List, Sequence
+from collections import deque
 from uuid import uuid4
-from cassandra.query import SimpleStatement
+from threading import Lock
+import time
+from cassandra.query import SimpleStatement, BatchStatement, BatchType
+from cassandra.util import uuid_from_time
 from langchain_cohere import CohereEmbeddings
 from langchain.schema import Document as LCDocument
 from langchain_core.chat_history import BaseChatMessageHistory
 from langchain_core.messages import HumanMessage, AIMessage, BaseMessage
-from app.core.vectorstore import vector_store_manager
+from app.core.vectorstore import get_vector_store_manager
+from app.core.database import aexecute
+from app.core.chat_embedding_queue import chat_embedding_queue
 from app.config import get_settings
 import logging
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
+# Prepared statements shared by every history object on the same Cassandra
+# session, keyed by (id(session), table) -> (session, statements)
+_statement_cache = {}
+_statement_lock = Lock()
+
+def get_history_statements(cass_session, table_name: str) -> dict:
+    """Prepare the chat history CQL statements once per Cassandra session and table"""
+    key = (id(cass_session), table_name)
+    with _statement_lock:
+        cached = _statement_cache.get(key)
+        # id() can be reused after a session is closed, so check identity too
+        if cached is not None and cached[0] is cass_session:
+            return cached[1]
+
+        statements = {
+            "insert": cass_session.prepare(
+                f"INSERT INTO {table_name} (session_id, ts, role, content) "
+                f"VALUES (?, ?, ?, ?);"
+            ),
+            "select": cass_session.prepare(
+                f"SELECT ts, role, content FROM {table_name} "
+                f"WHERE session_id = ? LIMIT ?;"
+            ),
+            "delete": cass_session.prepare(
+                f"DELETE FROM {table_name} WHERE session_id = ?;"
+            ),
+        }
+        _statement_cache[key] = (cass_session, statements)
+        logger.info(f"Prepared chat history statements for table '{table_name}'")
+        return statements
+
 class CassandraChatMessageHistory(BaseChatMessageHistory):
     """
     A ChatMessageHistory implementation that writes/reads each message to/from Cassandra,
     and also embeds each message into a dedicated Chroma vectorstore for retrieval.
+
+    The last `message_limit` messages are kept in an in-memory window that is
+    loaded lazily from Cassandra and updated on every write, so reading the
+    history of an active session does not hit the database. Writes made by
+    other API replicas for the same session are not seen until this object is
+    evicted from the session cache.
     """
 
     def __init__(
@@ -24,7 +68,8 @@ class CassandraChatMessageHistory(BaseChatMessageHistory):
         cass_session, 
         table_name: str, 
         session_id: str, 
-        message_limit: int = 10
+        message_limit: int = 10,
+        session_index=None
     ):
         """
         Initialize Cassandra chat message history.
@@ -34,32 +79,35 @@ class CassandraChatMessageHistory(BaseChatMessageHistory):
             table_name: Cassandra table name (e.g., "chat_history")
             session_id: Unique identifier for conversation session
             message_limit: Maximum number of recent messages to fetch
+            session_index: Optional CassandraSessionIndex updated on every write
         """
         self._cass = cass_session
         self._table = table_name
         self.session_id = session_id
         self._limit = message_limit
+        self._index = session_index
+        self._last_ts = 0.0
+        self._ts_lock = Lock()
+
+        # Write-through window of recent messages; None until loaded from Cassandra
+        self._window = None
+        self._window_lock = Lock()
+        # Bumped on every write so a read that raced a write does not fill the window
+        self._write_generation = 0
 
         # Get chat vectorstore from manager
-        self._chat_vs = vector_store_manager.get_chat_store()
+        self._chat_vs = get_vector_store_manager().get_chat_store()
 
         # Prepare Cassandra CQL statements
         self._prepare_statements()
 
     def _prepare_statements(self):
-        """Prepare CQL statements for better performance"""
+        """Use the CQL statements shared across history objects on this session"""
         try:
-            self._insert_stmt = self._cass.prepare(
-                f"INSERT INTO {self._table} (session_id, ts, role, content) "
-                f"VALUES (?, now(), ?, ?);"
-            )
-            self._select_stmt = self._cass.prepare(
-                f"SELECT ts, role, content FROM {self._table} "
-                f"WHERE session_id = ? LIMIT ?;"
-            )
-            self._delete_stmt = self._cass.prepare(
-                f"DELETE FROM {self._table} WHERE session_id = ?;"
-            )
+            statements = get_history_statements(self._cass, self._table)
+            self._insert_stmt = statements["insert"]
+            self._select_stmt = statements["select"]
+            self._delete_stmt = statements["delete"]
         except Exception as e:
             logger.error(f"Error preparing statements: {e}")
             raise
@@ -71,12 +119,7 @@ class CassandraChatMessageHistory(BaseChatMessageHistory):
         Args:
             message: HumanMessage or AIMessage to add
         """
-        if isinstance(message, HumanMessage):
-            self.add_user_message(message.content)
-        elif isinstance(message, AIMessage):
-            self.add_ai_message(message.content)
-        else:
-            raise ValueError(f"Unsupported message type: {type(message)}")
+        self.add_messages([message])
 
     def add_user_message(self, content: str) -> None:
         """
@@ -85,20 +128,7 @@ class CassandraChatMessageHistory(BaseChatMessageHistory):
         Args:
             content: The user's message content
         """
-        try:
-            # Insert into Cassandra
-            self._cass.execute(
-                self._insert_stmt, 
-                (self.session_id, "user", content)
-            )
-            logger.debug(f"Added user message to Cassandra for session {self.session_id}")
-
-            # Embed and add to Chroma vectorstore
-            self._embed_message(content, "user")
-            
-        except Exception as e:
-            logger.error(f"Error adding user message: {e}")
-            raise
+        self.add_messages([HumanMessage(content=content)])
 
     def add_ai_message(self, content: str) -> None:
         """
@@ -107,24 +137,85 @@ class CassandraChatMessageHistory(BaseChatMessageHistory):
         Args:
             content: The assistant's message content
         """
+        self.add_messages([AIMessage(content=content)])
+
+    def add_messages(self, messages: Sequence[BaseMessage]) -> None:
+        """
+        Write messages (e.g. a question/answer pair) in one Cassandra round-trip.
+        
+        The write is issued with execute_async so it overlaps with queuing the
+        embeddings, and only waited on at the end.
+        
+        Args:
+            messages: HumanMessage or AIMessage objects to add
+        """
+        if not messages:
+            return
         try:
-            # Insert into Cassandra
-            self._cass.execute(
-                self._insert_stmt, 
-                (self.session_id, "assistant", content)
+            statement, rows = self._build_insert(messages)
+            future = self._cass.execute_async(statement, rows)
+            index_futures = (
+                self._index.record_messages_async(self.session_id, len(messages))
+                if self._index else []
             )
-            logger.debug(f"Added AI message to Cassandra for session {self.session_id}")
 
-            # Embed and add to Chroma vectorstore
-            self._embed_message(content, "assistant")
-            
+            for message in messages:
+                self._embed_message(message.content, self._role_for(message))
+
+            future.result()
+            self._append_to_window(messages)
+            self._wait_for_index(index_futures)
+            logger.debug(f"Added {len(messages)} messages to Cassandra for session {self.session_id}")
+
         except Exception as e:
-            logger.error(f"Error adding AI message: {e}")
+            logger.error(f"Error adding messages: {e}")
             raise
 
+    def _wait_for_index(self, futures: List) -> None:
+        """Wait for session index writes without failing the message write"""
+        for future in futures:
+            try:
+                future.result()
+            except Exception as e:
+                logger.warning(f"Error updating session index: {e}")
+
+    def _next_timeuuids(self, count: int) -> List:
+        """
+        Generate strictly increasing client-side timeuuids.
+        
+        Messages written together get consecutive microsecond timestamps, so
+        their order is deterministic regardless of coordinator clocks.
+        """
+        with self._ts_lock:
+            base = max(time.time(), self._last_ts + 1e-6)
+            stamps = [base + i * 1e-6 for i in range(count)]
+            self._last_ts = stamps[-1]
+        return [uuid_from_time(stamp) for stamp in stamps]
+
+    def _build_insert(self, messages: Sequence[BaseMessage]):
+        """
+        Build the insert for a set of messages.
+        
+        Returns:
+            (statement, parameters) - a single bound insert, or an unlogged
+            batch on the session partition when there are several messages
+        """
+        params = [
+            (self.session_id, ts, self._role_for(message), message.content)
+            for ts, message in zip(self._next_timeuuids(len(messages)), messages)
+        ]
+        if len(params) == 1:
+            return self._insert_stmt, params[0]
+
+        # All rows share the partition key, so an unlogged batch is a single mutation
+        batch = BatchStatement(batch_type=BatchType.UNLOGGED)
+        for row in params:
+            batch.add(self._insert_stmt, row)
+        return batch, None
+
     def _embed_message(self, content: str, role: str) -> None:
         """
-        Embed a message and add it to the chat vectorstore.
+        Queue a message for batched embedding into the chat vectorstore.
         
         Args:
             content: Message content to embed
@@ -144,47 +235,140 @@ class CassandraChatMessageHistory(BaseChatMessageHistory):
                 }
             )
             
-            # Add to vectorstore
-            self._chat_vs.add_documents([doc])
-            self._chat_vs.persist()
+            # Embedded and persisted in batches by the write-behind queue
+            chat_embedding_queue.enqueue(doc)
             
-            logger.debug(f"Embedded {role} message for session {self.session_id}")
+            logger.debug(f"Queued {role} message embedding for session {self.session_id}")
             
         except Exception as e:
             logger.error(f"Error embedding message: {e}")
             # Don't raise here - embedding failure shouldn't break chat
 
+    def _append_to_window(self, messages: Sequence[BaseMessage]) -> None:
+        """Keep the in-memory window in sync after a successful write"""
+        with self._window_lock:
+            self._write_generation += 1
+            # An unloaded window will pick these up from Cassandra on first read
+            if self._window is not None:
+                self._window.extend(messages)
+
+    def _window_snapshot(self):
+        """Cached messages (None on a miss) and the write generation to load against"""
+        with self._window_lock:
+            window = list(self._window) if self._window is not None else None
+            return window, self._write_generation
+
+    def _load_window(self, msgs: List[BaseMessage], generation: int) -> List[BaseMessage]:
+        """Fill the window from a SELECT unless a write landed since it was issued"""
+        with self._window_lock:
+            if self._window is not None:
+                return list(self._window)
+            if generation == self._write_generation:
+                self._window = deque(msgs, maxlen=self._limit)
+            return msgs
+
     @property
     def messages(self) -> List[BaseMessage]:
         """
-        Fetch the most recent messages from Cassandra.
+        Get the most recent messages, reading Cassandra only on a window miss.
         
         Returns:
             List of HumanMessage or AIMessage objects ordered oldest to newest
         """
+        window, generation = self._window_snapshot()
+        if window is not None:
+            return window
         try:
             rows = self._cass.execute(
                 self._select_stmt, 
                 (self.session_id, self._limit)
             )
-            
-            msgs = []
-            # Cassandra returns rows in DESC order, reverse for chronological
-            for row in reversed(list(rows)):
-                if row.role == "user":
-                    msgs.append(HumanMessage(content=row.content))
-                elif row.role == "assistant":
-                    msgs.append(AIMessage(content=row.content))
-                else:
-                    logger.warning(f"Unknown role in message: {row.role}")
-                    
-            logger.debug(f"Retrieved {len(msgs)} messages for session {self.session_id}")
-            return msgs
+            return self._load_window(self._rows_to_messages(rows), generation)
             
         except Exception as e:
             logger.error(f"Error retrieving messages: {e}")
             return []
 
+    async def aget_messages(self) -> List[BaseMessage]:
+        """
+        Async version of messages using the driver's async API on a window miss.
+        
+        Returns:
+            List of HumanMessage or AIMessage objects ordered oldest to newest
+        """
+        window, generation = self._window_snapshot()
+        if window is not None:
+            return window
+        try:
+            rows = await aexecute(
+                self._cass,
+                self._select_stmt,
+                (self.session_id, self._limit)
+            )
+            return self._load_window(self._rows_to_messages(rows), generation)
+
+        except Exception as e:
+            logger.error(f"Error retrieving messages: {e}")
+            return []
+
+    async def aadd_messages(self, messages: Sequence[BaseMessage]) -> None:
+        """
+        Add messages without blocking the event loop.
+        
+        Args:
+            messages: HumanMessage or AIMessage objects to add
+        """
+        if not messages:
+            return
+        try:
+            statement, rows = self._build_insert(messages)
+            write = asyncio.ensure_future(aexecute(self._cass, statement, rows))
+            index_write = (
+                asyncio.ensure_future(self._index.arecord_messages(self.session_id, len(messages)))
+                if self._index else None
+            )
+
+            for message in messages:
+                self._embed_message(message.content, self._role_for(message))
+
+            await write
+            self._append_to_window(messages)
+            if index_write is not None:
+                try:
+                    await index_write
+                except Exception as e:
+                    # The index is bookkeeping, the messages themselves are stored
+                    logger.warning(f"Error updating session index: {e}")
+            logger.debug(f"Added {len(messages)} messages to Cassandra for session {self.session_id}")
+
+        except Exception as e:
+            logger.error(f"Error adding messages: {e}")
+            raise
+
+    @staticmethod
+    def _role_for(message: BaseMessage) -> str:
+        """Map a message to the role stored in Cassandra"""
+        if isinstance(message, HumanMessage):
+            return "user"
+        if isinstance(message, AIMessage):
+            return "assistant"
+        raise ValueError(f"Unsupported message type: {type(message)}")
+
+    def _rows_to_messages(self, rows) -> List[BaseMessage]:
+        """Convert Cassandra rows (newest first) into chronological messages"""
+        msgs = []
+        # Cassandra returns rows in DESC order, reverse for chronological
+        for row in reversed(list(rows)):
+            if row.role == "user":
+                msgs.append(HumanMessage(content=row.content))
+            elif row.role == "assistant":
+                msgs.append(AIMessage(content=row.content))
+            else:
+                logger.warning(f"Unknown role in message: {row.role}")
+                
+        logger.debug(f"Retrieved {len(msgs)} messages for session {self.session_id}")
+        return msgs
+
     def clear(self) -> None:
         """
         Delete all messages for this session from Cassandra.
@@ -193,6 +377,11 @@ class CassandraChatMessageHistory(BaseChatMessageHistory):
         """
         try:
             self._cass.execute(self._delete_stmt, (self.session_id,))
+            with self._window_lock:
+                self._write_generation += 1
+                self._window = deque(maxlen=self._limit)
+            if self._index:
+                self._index.remove(self.session_id)
             logger.info(f"Cleared all messages for session {self.session_id}")
             
             # Note: We don't clear embedded vectors as they might be useful
@@ -210,6 +399,8 @@ class CassandraChatMessageHistory(BaseChatMessageHistory):
             Number of messages in the session
         """
         try:
+            if self._index:
+                return self._index.get_message_count(self.session_id)
             result = self._cass.execute(
                 f"SELECT COUNT(*) FROM {self._table} WHERE session_id = %s",
                 (self.session_id,)
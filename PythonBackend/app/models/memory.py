@@ -82,6 +82,11 @@ class MemoryData(BaseModel):
         }
 
 
+class MemoryBatchRequest(BaseModel):
+    """Model for saving several memories in one request"""
+    items: List[MemoryData] = Field(..., min_length=1, description="Memories to save")
+
+
 class MemorySearchResult(BaseModel):
     """Model for memory search results"""
     content: str = Field(..., description="Relevant content excerpt")
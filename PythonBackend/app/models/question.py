@@ -10,6 +10,10 @@ class QuestionRequest(BaseModel):
     context: Optional[Dict[str, Any]] = Field(None, description="Additional context for the question")
     max_tokens: Optional[int] = Field(None, description="Maximum tokens in response")
     temperature: Optional[float] = Field(None, description="LLM temperature setting")
+    timeout_ms: Optional[int] = Field(
+        None,
+        description="Latency budget in milliseconds; optional stages are skipped when it runs low"
+    )
     
     @validator('question')
     def validate_question(cls, v):
@@ -46,6 +50,13 @@ class QuestionRequest(BaseModel):
                 raise ValueError("max_tokens cannot exceed 4000")
         return v
 
+    @validator('timeout_ms')
+    def validate_timeout_ms(cls, v):
+        """Ensure the latency budget is reasonable"""
+        if v is not None and (v < 1000 or v > 120000):
+            raise ValueError("timeout_ms must be between 1000 and 120000")
+        return v
+
     class Config:
         json_schema_extra = {
             "example": {
@@ -53,7 +64,8 @@ class QuestionRequest(BaseModel):
                 "session_id": "user-session-123",
                 "context": {"building_type": "residential", "floors": 5},
                 "max_tokens": 500,
-                "temperature": 0.7
+                "temperature": 0.7,
+                "timeout_ms": 20000
             }
         }
 
@@ -68,6 +80,7 @@ class QuestionResponse(BaseModel):
     retrieved_docs_count: int = Field(default=0, description="Number of documents retrieved")
     confidence_score: Optional[float] = Field(None, description="Confidence in the answer (0-1)")
     processing_time: Optional[float] = Field(None, description="Time taken to process in seconds")
+    skipped_stages: List[str] = Field(default_factory=list, description="Stages skipped or cut short to meet the latency budget")
     
     @validator('source')
     def validate_source(cls, v):
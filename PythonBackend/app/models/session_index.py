@@ -0,0 +1,180 @@
+import asyncio
+import base64
+import json
+import zlib
+from datetime import datetime, timezone
+from typing import List, Dict, Any, Optional
+from app.core.database import aexecute
+from app.config import get_settings
+import logging
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+class CassandraSessionIndex:
+    """
+    Cluster-wide index of chat sessions, maintained as messages are written.
+
+    Sessions are spread over a fixed number of `session_index` partitions
+    (buckets) holding the last activity time; rows share the chat history TTL
+    so inactive sessions drop out of the index. Message counts live in the
+    `session_message_counts` counter table and count messages written to a
+    session since it was last cleared.
+
+    Cassandra counters cannot carry a TTL, so counter rows are never expired:
+    the table grows by one row per session ever seen, and a count can exceed
+    the messages still stored once chat history rows expire. Listings only
+    read counts for sessions still in the TTL'd index, so stale counters are
+    never shown on their own.
+    """
+
+    def __init__(self, cass_session, buckets: int = settings.session_index_buckets):
+        """
+        Initialize the session index.
+
+        Args:
+            cass_session: Connected Cassandra session object
+            buckets: Number of index partitions sessions are hashed into
+        """
+        self._cass = cass_session
+        self._buckets = buckets
+        self._prepare_statements()
+
+    def _prepare_statements(self):
+        """Prepare CQL statements for better performance"""
+        try:
+            self._touch_stmt = self._cass.prepare(
+                "INSERT INTO session_index (bucket, session_id, last_activity) "
+                "VALUES (?, ?, ?);"
+            )
+            self._increment_stmt = self._cass.prepare(
+                "UPDATE session_message_counts SET message_count = message_count + ? "
+                "WHERE session_id = ?;"
+            )
+            self._list_stmt = self._cass.prepare(
+                "SELECT session_id, last_activity FROM session_index WHERE bucket = ?;"
+            )
+            self._count_stmt = self._cass.prepare(
+                "SELECT message_count FROM session_message_counts WHERE session_id = ?;"
+            )
+            self._counts_stmt = self._cass.prepare(
+                "SELECT session_id, message_count FROM session_message_counts "
+                "WHERE session_id IN ?;"
+            )
+            self._remove_stmt = self._cass.prepare(
+                "DELETE FROM session_index WHERE bucket = ? AND session_id = ?;"
+            )
+        except Exception as e:
+            logger.error(f"Error preparing session index statements: {e}")
+            raise
+
+    def _bucket_for(self, session_id: str) -> int:
+        return zlib.crc32(session_id.encode("utf-8")) % self._buckets
+
+    def _record_params(self, session_id: str, count: int):
+        now = datetime.now(timezone.utc)
+        return [
+            (self._touch_stmt, (self._bucket_for(session_id), session_id, now)),
+            (self._increment_stmt, (count, session_id)),
+        ]
+
+    def record_messages_async(self, session_id: str, count: int) -> List:
+        """
+        Record that messages were written to a session.
+
+        Returns:
+            Driver ResponseFutures for the index writes
+        """
+        return [
+            self._cass.execute_async(stmt, params)
+            for stmt, params in self._record_params(session_id, count)
+        ]
+
+    async def arecord_messages(self, session_id: str, count: int) -> None:
+        """Async version of record_messages_async"""
+        await asyncio.gather(*[
+            aexecute(self._cass, stmt, params)
+            for stmt, params in self._record_params(session_id, count)
+        ])
+
+    def get_message_count(self, session_id: str) -> int:
+        """Get the number of messages written to a session"""
+        row = self._cass.execute(self._count_stmt, (session_id,)).one()
+        return row.message_count if row and row.message_count else 0
+
+    def remove(self, session_id: str) -> None:
+        """
+        Remove a session from the index and reset its message count.
+
+        The reset reads the counter and subtracts it, which is not atomic: a
+        message recorded between the read and the subtraction stays counted.
+        Counts are therefore approximate for sessions written while cleared.
+        """
+        self._cass.execute(self._remove_stmt, (self._bucket_for(session_id), session_id))
+        # Deleted counters cannot safely be incremented again, so reset by subtraction
+        count = self.get_message_count(session_id)
+        if count:
+            self._cass.execute(self._increment_stmt, (-count, session_id))
+
+    @staticmethod
+    def _encode_token(bucket: int, paging_state: Optional[bytes]) -> str:
+        payload = {"b": bucket, "p": paging_state.hex() if paging_state else None}
+        return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+    @staticmethod
+    def _decode_token(token: str):
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(token.encode()))
+            paging_state = bytes.fromhex(payload["p"]) if payload["p"] else None
+            return int(payload["b"]), paging_state
+        except Exception:
+            raise ValueError("Invalid page token")
+
+    def list_sessions(self, page_size: int = 50, page_token: Optional[str] = None) -> Dict[str, Any]:
+        """
+        List indexed sessions one page at a time.
+
+        Args:
+            page_size: Maximum number of sessions to return
+            page_token: Token from a previous call to continue listing
+
+        Returns:
+            Dictionary with "sessions" and "next_page_token" (None when done)
+        """
+        bucket, paging_state = self._decode_token(page_token) if page_token else (0, None)
+        rows = []
+
+        while bucket < self._buckets and len(rows) < page_size:
+            bound = self._list_stmt.bind((bucket,))
+            bound.fetch_size = page_size - len(rows)
+            result = self._cass.execute(bound, paging_state=paging_state)
+            rows.extend(result.current_rows)
+
+            if result.paging_state:
+                # More rows in this bucket, continue from here next time
+                paging_state = result.paging_state
+                break
+            bucket += 1
+            paging_state = None
+
+        counts = {}
+        if rows:
+            count_rows = self._cass.execute(
+                self._counts_stmt,
+                ([row.session_id for row in rows],)
+            )
+            counts = {row.session_id: row.message_count or 0 for row in count_rows}
+
+        return {
+            "sessions": [
+                {
+                    "session_id": row.session_id,
+                    "last_activity": row.last_activity.isoformat() if row.last_activity else None,
+                    "message_count": counts.get(row.session_id, 0)
+                }
+                for row in rows
+            ],
+            "next_page_token": (
+                self._encode_token(bucket, paging_state) if bucket < self._buckets else None
+            )
+        }
@@ -0,0 +1,134 @@
+from typing import Dict, Any, List, Optional
+from collections import OrderedDict
+from threading import Lock
+import time
+import numpy as np
+from app.core.vectorstore import get_vector_store_manager
+from app.config import get_settings
+from app.core.container import container
+import logging
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+class SemanticCacheService:
+    """
+    Answer cache keyed on question embeddings.
+
+    A question hits the cache when its embedding has cosine similarity above
+    the configured threshold with a stored question. Entries are evicted LRU
+    when the cache is full, expire after a TTL, and are all dropped when the
+    main vectorstore version changes.
+
+    The version is shared through the vectorstore directory, so a sync or
+    memory save in any worker process invalidates every worker's cache.
+    """
+
+    def __init__(
+        self,
+        threshold: float = settings.semantic_cache_threshold,
+        max_entries: int = settings.semantic_cache_max_entries,
+        ttl_seconds: int = settings.semantic_cache_ttl_seconds
+    ):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        self._next_key = 0
+        self._corpus_version = get_vector_store_manager().get_version("main")
+        self._lock = Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "invalidations": 0}
+
+    @staticmethod
+    def _normalize(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _check_corpus_version(self) -> None:
+        """Drop every entry if the main vectorstore changed since they were stored"""
+        version = get_vector_store_manager().get_version("main")
+        if version != self._corpus_version:
+            if self._entries:
+                logger.info(f"Main vectorstore changed, invalidating {len(self._entries)} cached answers")
+                self._stats["invalidations"] += len(self._entries)
+            self._entries.clear()
+            self._corpus_version = version
+
+    def _expire(self, now: float) -> None:
+        expired = [
+            key for key, entry in self._entries.items()
+            if now - entry["created_at"] > self.ttl_seconds
+        ]
+        for key in expired:
+            del self._entries[key]
+        self._stats["expirations"] += len(expired)
+
+    def lookup(self, embedding: List[float]) -> Optional[Dict[str, Any]]:
+        """Return the cached result for the most similar stored question, if any"""
+        query = self._normalize(embedding)
+        with self._lock:
+            self._check_corpus_version()
+            self._expire(time.time())
+
+            if not self._entries:
+                self._stats["misses"] += 1
+                return None
+
+            keys = list(self._entries.keys())
+            matrix = np.stack([self._entries[key]["embedding"] for key in keys])
+            scores = matrix @ query
+            best = int(np.argmax(scores))
+
+            if scores[best] < self.threshold:
+                self._stats["misses"] += 1
+                return None
+
+            key = keys[best]
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            entry = self._entries[key]
+            logger.info(
+                f"Semantic cache hit ({scores[best]:.3f}) for cached question '{entry['question']}'"
+            )
+            return dict(entry["result"])
+
+    def store(self, question: str, embedding: List[float], result: Dict[str, Any]) -> None:
+        """Store a pipeline result for a question"""
+        with self._lock:
+            self._check_corpus_version()
+            self._entries[self._next_key] = {
+                "question": question,
+                "embedding": self._normalize(embedding),
+                "result": dict(result),
+                "created_at": time.time()
+            }
+            self._next_key += 1
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def clear(self) -> None:
+        """Remove all cached answers"""
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache size and hit-rate statistics"""
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "hit_rate": self._stats["hits"] / lookups if lookups else 0.0,
+                "threshold": self.threshold,
+                "ttl_seconds": self.ttl_seconds,
+                "corpus_version": self._corpus_version
+            }
+
+@container.component("semantic_cache_service")
+def get_semantic_cache_service() -> SemanticCacheService:
+    """Get the shared SemanticCacheService, constructed on first use"""
+    return SemanticCacheService()
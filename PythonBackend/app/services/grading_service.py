@@ -1,11 +1,28 @@
+from typing import Any, Dict, List, Optional
 from langchain_core.prompts import ChatPromptTemplate
 from app.core.llm import get_llm
 from app.models.grading import GradeDocuments, HallucinationScore
 from app.utils.prompts import GRADING_PREAMBLE, HALLUCINATION_PREAMBLE
+from app.utils.grounding import banded_grounding_score
+from app.config import get_settings
+from app.core.container import container
+import logging
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
 
 class GradingService:
     def __init__(self):
         self.llm = get_llm()
+        self._grounding_stats = {
+            "checks": 0,
+            "accepted_locally": 0,
+            "rejected_locally": 0,
+            "escalated": 0,
+            "llm_grounded": 0,
+            "llm_ungrounded": 0,
+            "llm_errors": 0
+        }
         self._setup_graders()
     
     def _setup_graders(self):
@@ -29,21 +46,125 @@ class GradingService:
         self.hallucination_prompt = ChatPromptTemplate.from_messages([
             ("human", "Documents:\n\n{documents}\n\nGenerated answer:\n\n{generation}")
         ])
+        
+        # Chains are built once and shared by every call
+        self.relevance_chain = self.relevance_prompt | self.relevance_grader
+        self.hallucination_chain = self.hallucination_prompt | self.hallucination_grader
+    
+    @staticmethod
+    def _relevance_verdict(result: Any) -> str:
+        # A failed grading call keeps the document rather than losing context
+        if isinstance(result, Exception):
+            logger.warning(f"Relevance grading failed, keeping document: {result}")
+            return "yes"
+        return result.binary_score
+    
+    def _batch_config(self) -> dict:
+        return {"max_concurrency": settings.grading_max_concurrency}
     
     def grade_document_relevance(self, question: str, document: str) -> str:
         """Grade if document is relevant to question"""
-        chain = self.relevance_prompt | self.relevance_grader
-        result = chain.invoke({"question": question, "document": document})
+        result = self.relevance_chain.invoke({"question": question, "document": document})
+        return result.binary_score
+    
+    async def agrade_document_relevance(self, question: str, document: str) -> str:
+        """Async version of grade_document_relevance"""
+        result = await self.relevance_chain.ainvoke({"question": question, "document": document})
         return result.binary_score
     
+    async def agrade_documents(self, question: str, documents: List[str]) -> List[str]:
+        """Grade several documents against one question with bounded concurrency"""
+        if not documents:
+            return []
+        results = await self.relevance_chain.abatch(
+            [{"question": question, "document": document} for document in documents],
+            config=self._batch_config(),
+            return_exceptions=True
+        )
+        return [self._relevance_verdict(result) for result in results]
+    
     def check_hallucination(self, documents: str, generation: str) -> str:
-        """Check if answer is grounded in documents"""
-        chain = self.hallucination_prompt | self.hallucination_grader
-        result = chain.invoke({
+        """Check if answer is grounded in documents ("yes" = grounded)"""
+        result = self.hallucination_chain.invoke({
             "documents": documents,
             "generation": generation
         })
         return result.binary_score
+    
+    async def acheck_hallucination(self, documents: str, generation: str) -> str:
+        """Async version of check_hallucination"""
+        result = await self.hallucination_chain.ainvoke({
+            "documents": documents,
+            "generation": generation
+        })
+        return result.binary_score
+
+    def local_grounding_score(self, documents: str, generation: str) -> float:
+        """Cheap lexical grounding score used to decide whether the LLM grader is needed"""
+        return round(banded_grounding_score(
+            documents,
+            generation,
+            accept_above=settings.grounding_accept_above,
+            reject_below=settings.grounding_reject_below,
+            reject_max_overlap=settings.grounding_reject_max_overlap
+        ), 3)
+    
+    def needs_llm_grading(self, score: float) -> bool:
+        """True if a local score falls in the uncertain band"""
+        return settings.grounding_reject_below <= score < settings.grounding_accept_above
+    
+    async def acheck_grounding(
+        self,
+        documents: str,
+        generation: str,
+        local_score: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        Tiered grounding check of an answer against its context.
+        
+        A local lexical overlap score settles clearly grounded or clearly
+        unsupported answers; only answers in the uncertain band between
+        grounding_reject_below and grounding_accept_above are escalated to
+        the LLM grader.
+        
+        Args:
+            local_score: Pre-computed local_grounding_score, if the caller has one
+        
+        Returns:
+            {"grounded": "yes"|"no", "score": local score, "method": "lexical"|"llm"}
+        """
+        self._grounding_stats["checks"] += 1
+        score = self.local_grounding_score(documents, generation) if local_score is None else local_score
+        
+        if score >= settings.grounding_accept_above:
+            self._grounding_stats["accepted_locally"] += 1
+            return {"grounded": "yes", "score": score, "method": "lexical"}
+        if score < settings.grounding_reject_below:
+            self._grounding_stats["rejected_locally"] += 1
+            return {"grounded": "no", "score": score, "method": "lexical"}
+        
+        self._grounding_stats["escalated"] += 1
+        try:
+            verdict = await self.acheck_hallucination(documents, generation)
+        except Exception as e:
+            # Keep the answer when the grader is unavailable rather than paying for a fallback
+            logger.error(f"Error checking hallucination: {e}")
+            self._grounding_stats["llm_errors"] += 1
+            return {"grounded": "yes", "score": score, "method": "lexical"}
+        self._grounding_stats["llm_grounded" if verdict == "yes" else "llm_ungrounded"] += 1
+        return {"grounded": verdict, "score": score, "method": "llm"}
+    
+    def get_grounding_stats(self) -> Dict[str, Any]:
+        """Get grounding check counters and how often the LLM grader was needed"""
+        checks = self._grounding_stats["checks"]
+        return {
+            **self._grounding_stats,
+            "escalation_rate": self._grounding_stats["escalated"] / checks if checks else 0.0,
+            "accept_above": settings.grounding_accept_above,
+            "reject_below": settings.grounding_reject_below
+        }
 
-# Singleton instance
-grading_service = GradingService()
\ No newline at end of file
+@container.component("grading_service")
+def get_grading_service() -> GradingService:
+    """Get the shared GradingService, constructed on first use"""
+    return GradingService()
@@ -1,9 +1,11 @@
 from datetime import datetime
 from typing import Dict, Any
-from app.core.vectorstore import vector_store_manager
+from app.core.vectorstore import get_vector_store_manager
 from app.core.database import cassandra_conn
 from app.core.llm import get_llm
-from app.services.rag_service import rag_service
+from app.services.rag_service import get_rag_service
+from app.services.vectorstore_service import get_vectorstore_service
+from app.core.container import container
 import logging
 import asyncio
 
@@ -14,8 +16,9 @@ class HealthService:
         """Check vectorstore health"""
         try:
             # Test retrieval
-            documents = rag_service.retrieve("test query")
+            documents = await get_rag_service().aretrieve("test query")
             
+            vector_store_manager = get_vector_store_manager()
             main_exists = vector_store_manager.check_store_exists("main")
             chat_exists = vector_store_manager.check_store_exists("chat")
             
@@ -107,5 +110,22 @@ class HealthService:
             "ready_for_requests": all_healthy
         }
 
-# Singleton instance
-health_service = HealthService()
\ No newline at end of file
+    def check_readiness(self) -> Dict[str, Any]:
+        """Check whether this instance can serve questions (cheap, no LLM calls)"""
+        database_ready = cassandra_conn.is_connected
+        vectorstore_service = get_vectorstore_service()
+        vectorstore_ready = vectorstore_service.is_ready()
+        ingestion = vectorstore_service.get_ingestion_status()
+        
+        return {
+            "ready": database_ready and vectorstore_ready,
+            "database_connected": database_ready,
+            "vectorstore_ready": vectorstore_ready,
+            "ingestion_state": ingestion["state"],
+            "ingestion_job": ingestion["job"]
+        }
+
+@container.component("health_service")
+def get_health_service() -> HealthService:
+    """Get the shared HealthService, constructed on first use"""
+    return HealthService()
\ No newline at end of file
@@ -1,9 +1,14 @@
-from typing import List, Dict
+from typing import List, Dict, Any, Optional
 from langchain.schema import Document
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from app.models.memory import MemoryData
-from app.core.vectorstore import vector_store_manager
+from app.core.vectorstore import get_vector_store_manager
+from app.core.dedup_index import NearDuplicateIndex, get_dedup_index
+from app.services.vectorstore_service import get_vectorstore_service
 from app.config import get_settings
+from app.core.container import container
+import asyncio
+import hashlib
 import logging
 
 logger = logging.getLogger(__name__)
@@ -16,43 +21,220 @@ class MemoryService:
             chunk_overlap=settings.chunk_overlap,
         )
     
+    @staticmethod
+    def _to_document(data: MemoryData) -> Document:
+        """Create a document from memory data"""
+        full_text = f"Title: {data.title}\nURL: {data.url}\n\n{data.bodyText}"
+        return Document(
+            page_content=full_text, 
+            metadata={
+                "source": data.url,
+                "title": data.title,
+                "type": data.type,
+                "timestamp": data.timestamp
+            }
+        )
+    
+    def _split(self, data: MemoryData) -> List[Document]:
+        return self.text_splitter.split_documents([self._to_document(data)])
+    
+    @staticmethod
+    def _dedup_index() -> Optional[NearDuplicateIndex]:
+        return get_dedup_index() if settings.memory_dedup_enabled else None
+    
+    @staticmethod
+    def _chunk_id(url: str, index: int) -> str:
+        """Deterministic chunk id, so saving a URL again overwrites its chunks"""
+        return f"mem-{hashlib.sha1(url.encode('utf-8')).hexdigest()[:16]}-{index:05d}"
+    
+    def _plan_upsert(self, collection, url: str, chunks: List[Document]) -> Dict[str, Any]:
+        """Compare new chunks of a URL with its stored version"""
+        stored = collection.get(where={"source": url}, include=["metadatas"])
+        stored_hashes = {
+            chunk_id: (metadata or {}).get("content_hash")
+            for chunk_id, metadata in zip(stored["ids"], stored["metadatas"])
+        }
+        
+        plan = {"docs": [], "ids": [], "stale_ids": []}
+        new_ids = set()
+        for index, chunk in enumerate(chunks):
+            chunk_id = self._chunk_id(url, index)
+            new_ids.add(chunk_id)
+            chunk.metadata["content_hash"] = hashlib.sha1(chunk.page_content.encode("utf-8")).hexdigest()
+            # Unchanged chunks keep their stored embedding
+            if stored_hashes.get(chunk_id) != chunk.metadata["content_hash"]:
+                plan["docs"].append(chunk)
+                plan["ids"].append(chunk_id)
+        # Covers chunks past the new end and ids from before deterministic ids
+        plan["stale_ids"] = [chunk_id for chunk_id in stored_hashes if chunk_id not in new_ids]
+        return plan
+    
     async def save_memory(self, data: MemoryData) -> Dict:
-        """Save memory data to vectorstore"""
-        try:
-            # Create document from memory data
-            full_text = f"Title: {data.title}\nURL: {data.url}\n\n{data.bodyText}"
-            doc = Document(
-                page_content=full_text, 
-                metadata={
-                    "source": data.url,
-                    "title": data.title,
-                    "type": data.type,
-                    "timestamp": data.timestamp
-                }
+        """Save memory data to vectorstore, replacing any earlier version of its URL"""
+        result = (await self.save_memories([data]))[0]
+        if result["status"] == "failed":
+            raise RuntimeError(result["error"])
+        if result["status"] == "duplicate":
+            logger.info(
+                f"⏭️ Skipped {data.url}: near-duplicate of {result['duplicate_of']['source']} "
+                f"({result['duplicate_of']['similarity']:.0%} similar)"
             )
-            
-            # Split into chunks
-            docs_split = self.text_splitter.split_documents([doc])
-            
-            # Get vectorstore and add documents
-            vectorstore = vector_store_manager.get_main_store()
-            vectorstore.add_documents(docs_split)
-            vectorstore.persist()
-            
-            logger.info(f"Saved {len(docs_split)} chunks from {data.title}")
-            
-            return {
-                "chunks_created": len(docs_split),
-                "source": data.url
+        return result
+    
+    async def save_memories(self, items: List[MemoryData]) -> List[Dict[str, Any]]:
+        """
+        Upsert many memories by source URL with one embedding pass.
+        
+        When a URL appears more than once only its last item is saved.
+        Near-duplicates of pages saved under another URL, or of earlier items
+        in the batch, are skipped. Remaining items are split concurrently and
+        only chunks whose content changed since the stored version are sent to
+        the embedding scheduler; chunks the new version no longer has are
+        deleted. An item that fails to embed keeps its stale chunks, and
+        saving it again re-embeds only what is still out of date.
+        
+        Returns:
+            One result per item, in request order
+        """
+        results: List[Dict[str, Any]] = [
+            {
+                "index": i,
+                "source": data.url,
+                "status": "saved",
+                "chunks_created": 0,
+                "chunks_embedded": 0,
+                "chunks_removed": 0
             }
-        except Exception as e:
-            logger.error(f"Error saving memory: {e}")
-            raise
+            for i, data in enumerate(items)
+        ]
+        
+        last_index = {data.url: i for i, data in enumerate(items)}
+        for i, data in enumerate(items):
+            if last_index[data.url] != i:
+                results[i].update(status="superseded", superseded_by=last_index[data.url])
+        pending = sorted(last_index.values())
+        
+        dedup_index = self._dedup_index()
+        signatures: Dict[int, Optional[List[int]]] = {}
+        if dedup_index is not None:
+            computed = await asyncio.gather(
+                *(asyncio.to_thread(dedup_index.signature, items[i].bodyText) for i in pending)
+            )
+            signatures = dict(zip(pending, computed))
+            accepted = []
+            for i in pending:
+                signature = signatures[i]
+                # A page saved again under its own URL is an update, not a duplicate
+                duplicate = dedup_index.find_duplicate(signature, exclude_source=items[i].url)
+                if duplicate is None and signature is not None:
+                    # Also compare against items accepted earlier in this batch
+                    for j in accepted:
+                        if signatures[j] is None:
+                            continue
+                        similarity = dedup_index.similarity(signatures[j], signature)
+                        if similarity >= dedup_index.threshold:
+                            duplicate = {
+                                "source": items[j].url,
+                                "title": items[j].title,
+                                "similarity": round(similarity, 3)
+                            }
+                            dedup_index.record_suppressed()
+                            break
+                if duplicate is not None:
+                    results[i].update(status="duplicate", duplicate_of=duplicate)
+                else:
+                    accepted.append(i)
+            pending = accepted
+        
+        # Tokenizing for the splitter releases the GIL, so threads overlap
+        splits = await asyncio.gather(
+            *(asyncio.to_thread(self._split, items[i]) for i in pending),
+            return_exceptions=True
+        )
+        
+        vector_store_manager = get_vector_store_manager()
+        collection = vector_store_manager.get_main_store()._collection
+        plans: Dict[int, Dict[str, Any]] = {}
+        docs: List[Document] = []
+        ids: List[str] = []
+        owner: Dict[str, int] = {}
+        for i, chunks in zip(pending, splits):
+            if isinstance(chunks, Exception):
+                results[i].update(status="failed", error=f"Could not split content: {chunks}")
+                continue
+            try:
+                plan = await asyncio.to_thread(self._plan_upsert, collection, items[i].url, chunks)
+            except Exception as e:
+                results[i].update(status="failed", error=f"Could not read stored version: {e}")
+                continue
+            plans[i] = plan
+            docs.extend(plan["docs"])
+            ids.extend(plan["ids"])
+            owner.update({chunk_id: i for chunk_id in plan["ids"]})
+            results[i]["chunks_created"] = len(chunks)
+        
+        failed_ids = set()
+        if docs:
+            try:
+                report = await asyncio.to_thread(
+                    get_vectorstore_service().embed_documents_scheduled, docs, ids
+                )
+                failed_ids = set(report["failed_ids"])
+            except Exception as e:
+                logger.error(f"Error embedding memory batch: {e}")
+                failed_ids = set(ids)
+        failed_items = {owner[chunk_id] for chunk_id in failed_ids}
+        
+        stale_ids = []
+        for i, plan in plans.items():
+            if i in failed_items:
+                results[i].update(status="failed", chunks_created=0, error="Embedding failed")
+                continue
+            results[i].update(chunks_embedded=len(plan["ids"]), chunks_removed=len(plan["stale_ids"]))
+            stale_ids.extend(plan["stale_ids"])
+            if dedup_index is not None:
+                dedup_index.add(items[i].url, items[i].title, signatures[i])
+        
+        if stale_ids:
+            get_vectorstore_service().delete_chunks(stale_ids)
+            vector_store_manager.get_main_store().persist()
+            vector_store_manager.bump_version("main")
+        
+        saved = sum(1 for result in results if result["status"] == "saved")
+        skipped = sum(1 for result in results if result["status"] in ("duplicate", "superseded"))
+        logger.info(
+            f"Saved {saved}/{len(items)} memories "
+            f"({len(ids) - len(failed_ids)} chunks embedded, {len(stale_ids)} removed, "
+            f"{skipped} skipped)"
+        )
+        return results
+    
+    def delete_memory(self, url: str) -> int:
+        """
+        Delete every chunk saved from a URL.
+        
+        Returns:
+            Number of chunks deleted
+        """
+        vector_store_manager = get_vector_store_manager()
+        collection = vector_store_manager.get_main_store()._collection
+        chunk_ids = collection.get(where={"source": url}, include=[])["ids"]
+        if chunk_ids:
+            get_vectorstore_service().delete_chunks(chunk_ids)
+            vector_store_manager.get_main_store().persist()
+            vector_store_manager.bump_version("main")
+        
+        dedup_index = self._dedup_index()
+        if dedup_index is not None:
+            dedup_index.remove(url)
+        
+        logger.info(f"🗑️ Deleted {len(chunk_ids)} chunks from {url}")
+        return len(chunk_ids)
     
     def search_memories(self, query: str, limit: int = 5) -> List[Dict]:
         """Search through saved memories"""
         try:
-            vectorstore = vector_store_manager.get_main_store()
+            vectorstore = get_vector_store_manager().get_main_store()
             retriever = vectorstore.as_retriever(search_kwargs={"k": limit})
             docs = retriever.get_relevant_documents(query)
             
@@ -69,5 +251,7 @@ class MemoryService:
             logger.error(f"Error searching memories: {e}")
             raise
 
-# Singleton instance
-memory_service = MemoryService()
\ No newline at end of file
+@container.component("memory_service")
+def get_memory_service() -> MemoryService:
+    """Get the shared MemoryService, constructed on first use"""
+    return MemoryService()
\ No newline at end of file
@@ -1,22 +1,41 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, List, AsyncIterator, Optional, Tuple
+import asyncio
+import numpy as np
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.runnables import RunnableWithMessageHistory
+from langchain_core.messages import HumanMessage, AIMessage
 from langchain.schema import Document
-from app.core.vectorstore import vector_store_manager
+from app.core.vectorstore import get_vector_store_manager
+from app.core.lexical_index import get_lexical_index, identifiers, reciprocal_rank_fusion
+from app.core.deadline import Deadline
 from app.core.llm import get_llm
-from app.services.session_service import session_service
-from app.services.grading_service import grading_service
+from app.services.session_service import get_session_service
+from app.services.grading_service import get_grading_service
+from app.services.cache_service import get_semantic_cache_service
 from app.utils.prompts import SIMPLIFICATION_PROMPT, RAG_SYSTEM_PROMPT
+from app.utils.retrieval import adaptive_cutoff, cosine_similarities, maximal_marginal_relevance
 from app.config import get_settings
+from app.core.container import container
 import logging
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
 class RAGService:
+    _TIMEOUT_ANSWER = "I'm sorry, I couldn't answer your question within the time allowed. Please try again."
+    
     def __init__(self):
         self.llm = get_llm()
+        self._pipeline_stats = {
+            "rag_answers": 0,
+            "simplifications_discarded": 0,
+            "speculative_fallbacks": 0,
+            "speculation_used": 0,
+            "speculation_wasted": 0
+        }
+        # Keeps fire-and-forget tasks (history writes off the critical path) alive
+        self._background_tasks = set()
         self._setup_chains()
     
     def _setup_chains(self):
@@ -40,7 +59,7 @@ class RAGService:
         # Make it conversational
         self.conversational_rag_chain = RunnableWithMessageHistory(
             rag_chain,
-            lambda session_id: session_service.get_session_history_manager(session_id),
+            lambda session_id: get_session_service().get_session_history_manager(session_id),
             input_messages_key="question",
             history_messages_key="chat_history",
         )
@@ -51,123 +70,701 @@ class RAGService:
             ("human", "Question: {question}\nAnswer:")
         ])
         
-        fallback_chain = fallback_prompt | self.llm | StrOutputParser()
+        # Bare chain for speculative runs, which must not write history unless used
+        self.fallback_chain = fallback_prompt | self.llm | StrOutputParser()
         
         self.conversational_fallback_chain = RunnableWithMessageHistory(
-            fallback_chain,
-            lambda session_id: session_service.get_session_history_manager(session_id),
+            self.fallback_chain,
+            lambda session_id: get_session_service().get_session_history_manager(session_id),
             input_messages_key="question",
             history_messages_key="chat_history",
         )
     
-    def retrieve(self, question: str, session_id: str = None) -> str:
-        """Retrieve relevant documents from both chat history and main vectorstore"""
+    def _select(
+        self,
+        candidate_ids: List[str],
+        docs: Dict[str, Document],
+        embeddings: Dict[str, Any],
+        query_embedding: List[float],
+        relevance: Optional[np.ndarray] = None,
+        exempt_ids: Optional[set] = None
+    ) -> List[Document]:
+        """
+        Choose which candidates go into the prompt.
+        
+        Weak matches are cut by score (so k adapts to the score distribution)
+        and the rest are picked by maximal marginal relevance, so
+        near-identical neighbouring chunks do not crowd out other content.
+        """
+        if not candidate_ids:
+            return []
+        matrix = np.asarray([embeddings[chunk_id] for chunk_id in candidate_ids], dtype=np.float32)
+        scores = cosine_similarities(query_embedding, matrix)
+        exempt = np.array([chunk_id in (exempt_ids or ()) for chunk_id in candidate_ids])
+        kept = adaptive_cutoff(scores, settings.retrieval_min_score, settings.retrieval_score_margin, exempt)
+        relevance = scores if relevance is None else relevance
+        picked = maximal_marginal_relevance(
+            relevance[kept], matrix[kept], settings.retrieval_max_k, settings.retrieval_mmr_lambda
+        )
+        return [docs[candidate_ids[kept[i]]] for i in picked]
+    
+    @staticmethod
+    def _collect(results: Dict[str, Any], docs: Dict[str, Document], embeddings: Dict[str, Any]) -> List[str]:
+        """Add Chroma get() results to the docs/embeddings maps and return their ids"""
+        for chunk_id, text, metadata, embedding in zip(
+            results["ids"], results["documents"], results["metadatas"], results["embeddings"]
+        ):
+            docs[chunk_id] = Document(page_content=text, metadata=metadata or {})
+            embeddings[chunk_id] = embedding
+        return list(results["ids"])
+    
+    def _query_store(self, store, query_embedding: List[float], docs, embeddings) -> List[str]:
+        """Nearest candidates of a store, in similarity order"""
+        hits = store._collection.query(
+            query_embeddings=[query_embedding],
+            n_results=settings.retrieval_candidate_k,
+            include=["documents", "metadatas", "embeddings"]
+        )
+        first_query = {key: hits[key][0] for key in ("ids", "documents", "metadatas", "embeddings")}
+        return self._collect(first_query, docs, embeddings)
+    
+    def _search_chat(self, query_embedding: List[float]) -> List[Document]:
+        """Search chat history by vector"""
+        docs, embeddings = {}, {}
+        candidate_ids = self._query_store(
+            get_vector_store_manager().get_chat_store(), query_embedding, docs, embeddings
+        )
+        return self._select(candidate_ids, docs, embeddings, query_embedding)
+    
+    def _search_main(self, question: str, query_embedding: List[float]) -> List[Document]:
+        """
+        Search the main store, fusing vector and BM25 rankings.
+        
+        Dense embeddings miss exact identifiers like "Part L1A" or
+        "BS EN 12056", so lexical hits are merged in with reciprocal rank
+        fusion. The best lexical hit is kept even if its embedding is a weak
+        match, but only when it contains an identifier named in the question;
+        otherwise it has to pass the score cutoff like any other chunk.
+        """
+        main_store = get_vector_store_manager().get_main_store()
+        docs, embeddings = {}, {}
+        vector_ranking = self._query_store(main_store, query_embedding, docs, embeddings)
+        if not settings.hybrid_retrieval_enabled:
+            return self._select(vector_ranking, docs, embeddings, query_embedding)
+        
+        lexical_ranking = [
+            chunk_id for chunk_id, _ in get_lexical_index().search(question, settings.retrieval_candidate_k)
+        ]
+        missing = [chunk_id for chunk_id in lexical_ranking if chunk_id not in docs]
+        if missing:
+            self._collect(
+                main_store._collection.get(ids=missing, include=["documents", "metadatas", "embeddings"]),
+                docs,
+                embeddings
+            )
+        
+        fused = [
+            (chunk_id, score)
+            for chunk_id, score in reciprocal_rank_fusion([vector_ranking, lexical_ranking])
+            if chunk_id in docs
+        ]
+        if not fused:
+            return []
+        fused_scores = np.array([score for _, score in fused])
+        question_identifiers = identifiers(question)
+        exempt_ids = {
+            chunk_id for chunk_id in lexical_ranking[:1]
+            if chunk_id in docs and question_identifiers & identifiers(docs[chunk_id].page_content)
+        }
+        return self._select(
+            [chunk_id for chunk_id, _ in fused],
+            docs,
+            embeddings,
+            query_embedding,
+            relevance=fused_scores / fused_scores.max(),
+            exempt_ids=exempt_ids
+        )
+    
+    def _merge_results(self, question: str, named_results: List[Any]) -> List[Document]:
+        """Merge (store_name, docs) results in store order, dropping duplicate chunks"""
+        seen = set()
+        combined_docs = []
+        for store_name, docs in named_results:
+            logger.info(f"Retrieved {len(docs)} {store_name} chunks for '{question}'")
+            for doc in docs:
+                if doc.page_content in seen:
+                    continue
+                seen.add(doc.page_content)
+                combined_docs.append(doc)
+        
+        if not combined_docs:
+            logger.warning(f"No relevant chunks found for: {question}")
+        return combined_docs
+    
+    def _format_documents(self, docs: List[Document]) -> str:
+        """Join chunks for the prompt; whole chunks until the budget is spent, only the last one is cut"""
+        parts = []
+        budget = settings.retrieval_max_context_chars
+        for doc in docs:
+            if budget <= 0:
+                break
+            parts.append(doc.page_content[:budget])
+            budget -= len(parts[-1])
+        return "\n\n".join(parts)
+    
+    async def aretrieve_documents(
+        self,
+        question: str,
+        query_embedding: Optional[List[float]] = None
+    ) -> List[Document]:
+        """Retrieve chunks from chat history and the main vectorstore concurrently"""
         try:
-            # Search chat history vectorstore first
-            chat_store = vector_store_manager.get_chat_store()
-            chat_retriever = chat_store.as_retriever(search_kwargs={"k": 3})
-            docs_chat = chat_retriever.get_relevant_documents(question)
-            logger.info(f"Retrieved {len(docs_chat)} chat chunks for '{question}'")
-            
-            # Search main document vectorstore
-            main_store = vector_store_manager.get_main_store()
-            main_retriever = main_store.as_retriever(search_kwargs={"k": 3})
-            docs_main = main_retriever.get_relevant_documents(question)
-            logger.info(f"Retrieved {len(docs_main)} main chunks for '{question}'")
-            
-            # Combine results (chat chunks first for context)
-            combined_docs = docs_chat + docs_main
-            
-            if not combined_docs:
-                logger.warning(f"No relevant chunks found for: {question}")
-                return ""
+            # Embed the question once and reuse the vector for every store
+            if query_embedding is None:
+                query_embedding = await get_vector_store_manager().embeddings.aembed_query(question)
             
-            # Join document contents
-            docs_text = "\n\n".join(doc.page_content[:500] for doc in combined_docs)
-            return docs_text
+            chat_docs, main_docs = await asyncio.gather(
+                asyncio.to_thread(self._search_chat, query_embedding),
+                asyncio.to_thread(self._search_main, question, query_embedding)
+            )
+            return self._merge_results(question, [("chat", chat_docs), ("main", main_docs)])
             
         except Exception as e:
             logger.error(f"Error retrieving documents: {e}")
-            return ""
+            return []
     
-    def process_question(self, question: str, session_id: str) -> Dict[str, Any]:
-        """Main RAG pipeline processing"""
-        logger.info(f"Processing question: {question} (session: {session_id})")
-        
-        # Step 1: Retrieve relevant documents
-        documents = self.retrieve(question, session_id)
+    async def aretrieve(
+        self,
+        question: str,
+        session_id: str = None,
+        query_embedding: Optional[List[float]] = None
+    ) -> str:
+        """Retrieve and format context from all stores, searched concurrently"""
+        return self._format_documents(await self.aretrieve_documents(question, query_embedding))
+    
+    async def _afilter_relevant(
+        self,
+        question: str,
+        docs: List[Document],
+        deadline: Deadline
+    ) -> List[Document]:
+        """Drop chunks the grader judges irrelevant; all chunks are graded in parallel"""
+        if not settings.relevance_grading_enabled or not docs:
+            return docs
+        if not deadline.allows("relevance_grading", settings.relevance_grading_min_seconds):
+            return docs
+        try:
+            grades = await deadline.run(
+                "relevance_grading",
+                get_grading_service().agrade_documents(question, [doc.page_content for doc in docs])
+            )
+        except Exception as e:
+            logger.error(f"Error grading document relevance: {e}")
+            return docs
+        if grades is None:
+            return docs
+        relevant = [doc for doc, grade in zip(docs, grades) if grade == "yes"]
+        logger.info(f"Relevance grading kept {len(relevant)}/{len(docs)} chunks")
+        return relevant
+    
+    async def _acontext(
+        self,
+        question: str,
+        query_embedding: Optional[List[float]],
+        deadline: Deadline
+    ) -> str:
+        """Retrieve, relevance-filter and format the context for a question"""
+        docs = await self.aretrieve_documents(question, query_embedding)
+        docs = await self._afilter_relevant(question, docs, deadline)
+        documents = self._format_documents(docs)
         logger.info(f"Retrieved {len(documents)} characters of context")
+        return documents
+    
+    async def _aembed_question(self, question: str) -> Optional[List[float]]:
+        """Embed the question once for the semantic cache and retrieval"""
+        try:
+            return await get_vector_store_manager().embeddings.aembed_query(question)
+        except Exception as e:
+            logger.error(f"Error embedding question: {e}")
+            return None
+    
+    async def _acache_embedding(
+        self,
+        session_id: str,
+        query_embedding: Optional[List[float]]
+    ) -> Optional[List[float]]:
+        """
+        Embedding to look up and store the answer under, or None to bypass the cache.
+        
+        Cached answers are keyed on the question alone, so they are only valid
+        for a session's first question; follow-ups such as "what about the
+        second one?" depend on the chat history and bypass the cache.
+        """
+        if not settings.semantic_cache_enabled or query_embedding is None:
+            return None
+        try:
+            history_manager = get_session_service().get_session_history_manager(session_id)
+            if await history_manager.aget_messages():
+                return None
+        except Exception as e:
+            logger.error(f"Error reading chat history for the semantic cache: {e}")
+            return None
+        return query_embedding
+    
+    async def _alookup_cache(
+        self,
+        question: str,
+        session_id: str,
+        cache_embedding: Optional[List[float]]
+    ) -> Optional[Dict[str, Any]]:
+        """Return a cached result and record the turn in the session history"""
+        if cache_embedding is None:
+            return None
+        
+        cached = get_semantic_cache_service().lookup(cache_embedding)
+        if cached is None:
+            return None
+        
+        # Keep the conversation continuous even though no chain ran
+        try:
+            history_manager = get_session_service().get_session_history_manager(session_id)
+            await history_manager.aadd_messages([
+                HumanMessage(content=question),
+                AIMessage(content=cached["answer"])
+            ])
+        except Exception as e:
+            logger.error(f"Error updating chat history for cached answer: {e}")
+        
+        cached.update({"source": "cache", "session_id": session_id, "skipped_stages": []})
+        return cached
+    
+    async def _asimplify(self, answer: str) -> str:
+        """Simplify an answer for the UI, keeping it unchanged on failure"""
+        try:
+            return await self.simplify_chain.ainvoke({"answer": answer})
+        except Exception as e:
+            logger.error(f"Error simplifying answer: {e}")
+            return answer
+    
+    async def _asimplify_within(
+        self,
+        answer: str,
+        deadline: Deadline,
+        task: Optional["asyncio.Task"] = None
+    ) -> str:
+        """Simplify (or await an already started simplification) within the budget"""
+        if task is None:
+            if not deadline.allows("simplification", settings.simplification_min_seconds):
+                return answer
+            task = self._asimplify(answer)
+        return await deadline.run("simplification", task, default=answer)
+    
+    async def _acheck_grounding_within(
+        self,
+        documents: str,
+        generation: str,
+        local_score: float,
+        deadline: Deadline
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Grounding verdict, or None when the LLM grader does not fit the budget.
+        
+        Local verdicts cost nothing and always run; only escalation to the
+        LLM grader is skipped.
+        """
+        grading_service = get_grading_service()
+        check = grading_service.acheck_grounding(
+            documents=documents,
+            generation=generation,
+            local_score=local_score
+        )
+        if not grading_service.needs_llm_grading(local_score):
+            # Settled from the local score without any I/O, so the budget does not apply
+            grounding = await check
+        elif not deadline.allows("grounding_check", settings.grounding_check_min_seconds):
+            check.close()
+            return None
+        else:
+            grounding = await deadline.run("grounding_check", check)
+        if grounding is not None:
+            logger.info(
+                f"Grounding check: {grounding['grounded']} "
+                f"(score {grounding['score']}, via {grounding['method']})"
+            )
+        return grounding
+    
+    def _should_speculate(self, local_score: float) -> bool:
+        """
+        Start the fallback before the grader's verdict?
+        
+        Only when the LLM grader will run (local verdicts are instant) and the
+        local score is low enough that rejection is likely. At most
+        speculative_fallback_max_share of answers may speculate, which caps
+        the extra LLM spend.
+        """
+        if not settings.speculative_fallback_enabled:
+            return False
+        if not get_grading_service().needs_llm_grading(local_score):
+            return False
+        if local_score >= settings.speculative_fallback_below:
+            return False
+        share = (self._pipeline_stats["speculative_fallbacks"] + 1) / self._pipeline_stats["rag_answers"]
+        return share <= settings.speculative_fallback_max_share
+    
+    async def _aspeculative_fallback(self, question: str, session_id: str) -> Tuple[str, str]:
+        """Fallback answer and its simplification, without writing chat history"""
+        history_manager = get_session_service().get_session_history_manager(session_id)
+        chat_history = await history_manager.aget_messages()
+        answer = await self.fallback_chain.ainvoke({"question": question, "chat_history": chat_history})
+        return answer, await self._asimplify(answer)
+    
+    @staticmethod
+    async def _acancel_pending(*tasks: Optional["asyncio.Task"]) -> None:
+        """Cancel tasks still running and await them all, so their exceptions are retrieved"""
+        started = [task for task in tasks if task is not None]
+        for task in started:
+            task.cancel()
+        await asyncio.gather(*started, return_exceptions=True)
+    
+    async def _aresolve_fallback(
+        self,
+        question: str,
+        session_id: str,
+        speculative: Optional["asyncio.Task"],
+        deadline: Deadline
+    ) -> Tuple[str, str, str]:
+        """
+        Produce the fallback answer, reusing a speculative one if it succeeded.
+        
+        Bounded by the remaining budget: when it runs out, an apology is
+        returned with source "error" and "fallback" is reported as skipped.
+        """
+        if speculative is not None:
+            try:
+                speculated = await deadline.run("fallback", speculative)
+                if speculated is None:
+                    return self._TIMEOUT_ANSWER, self._TIMEOUT_ANSWER, "error"
+                answer, simplified_answer = speculated
+                self._pipeline_stats["speculation_used"] += 1
+                # RunnableWithMessageHistory did not run, so record the turn here,
+                # off the critical path
+                self._run_in_background(self._arecord_turn(question, answer, session_id))
+                return answer, simplified_answer, "fallback"
+            except Exception as e:
+                logger.error(f"Speculative fallback failed, running it again: {e}")
         
-        # Step 2: Generate answer using RAG chain
         try:
-            rag_response = self.conversational_rag_chain.invoke(
-                {
-                    "question": question,
-                    "documents": documents
-                },
-                config={"configurable": {"session_id": session_id}}
+            answer = await deadline.run(
+                "fallback",
+                self.conversational_fallback_chain.ainvoke(
+                    {"question": question},
+                    config={"configurable": {"session_id": session_id}}
+                )
             )
-            logger.info("Generated RAG response")
+            if answer is None:
+                return self._TIMEOUT_ANSWER, self._TIMEOUT_ANSWER, "error"
+            source = "fallback"
         except Exception as e:
-            logger.error(f"Error in RAG chain: {e}")
-            rag_response = ""
+            logger.error(f"Error in fallback chain: {e}")
+            answer = "I apologize, but I'm having trouble answering your question right now."
+            source = "error"
+        return answer, await self._asimplify_within(answer, deadline), source
+    
+    async def _arecord_turn(self, question: str, answer: str, session_id: str) -> None:
+        """Write a question/answer turn to the session history"""
+        try:
+            history_manager = get_session_service().get_session_history_manager(session_id)
+            await history_manager.aadd_messages([
+                HumanMessage(content=question),
+                AIMessage(content=answer)
+            ])
+        except Exception as e:
+            logger.error(f"Error updating chat history for fallback answer: {e}")
+    
+    def _run_in_background(self, coro) -> None:
+        task = asyncio.create_task(coro)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+    
+    @staticmethod
+    def _cache_result(
+        question: str,
+        cache_embedding: Optional[List[float]],
+        result: Dict[str, Any],
+        deadline: Deadline
+    ) -> None:
+        """
+        Cache a result if it is a fully checked, grounded RAG answer.
+        
+        Shared by the plain and streaming pipelines, so a cached answer is
+        always one /rag would have kept; entries are invalidated with the corpus.
+        """
+        if (
+            cache_embedding is None
+            or result["source"] != "rag"
+            or result["grounded"] != "yes"
+            or deadline.skipped
+        ):
+            return
+        get_semantic_cache_service().store(question, cache_embedding, result)
+    
+    def get_pipeline_stats(self) -> Dict[str, Any]:
+        """Get counters for discarded simplifications and speculative fallbacks"""
+        return dict(self._pipeline_stats)
+    
+    @staticmethod
+    def _grounding_event(grounding: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Payload of the streamed grounding event; None means no check ran"""
+        if grounding is None:
+            return {"grounded": None, "hallucinated": False}
+        return {**grounding, "hallucinated": grounding["grounded"] == "no"}
+    
+    def process_question(
+        self,
+        question: str,
+        session_id: str,
+        timeout_ms: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Synchronous entry point for scripts; must not be called from a running event loop"""
+        return asyncio.run(self.aprocess_question(question, session_id, timeout_ms))
+    
+    async def aprocess_question(
+        self,
+        question: str,
+        session_id: str,
+        timeout_ms: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Main RAG pipeline processing.
+        
+        Relevance grading, the LLM grounding check and simplification are
+        skipped when less of the request's latency budget remains than they
+        usually take. Answer generation and the fallback are cut off when the
+        budget runs out, returning an apology with source "error"; only the
+        question embedding and retrieval (one embedding call and local index
+        lookups) run unbounded.
+        """
+        logger.info(f"Processing question: {question} (session: {session_id})")
+        deadline = Deadline.from_millis(timeout_ms, settings.rag_default_timeout_seconds)
         
-        # Step 3: Check for hallucinations
-        hallucination_score = "no"  # Default to no hallucination
-        if documents and rag_response:
+        query_embedding = await self._aembed_question(question)
+        cache_embedding = await self._acache_embedding(session_id, query_embedding)
+        cached = await self._alookup_cache(question, session_id, cache_embedding)
+        if cached is not None:
+            return cached
+        
+        # Step 1: Retrieve relevant documents
+        documents = await self._acontext(question, query_embedding, deadline)
+        
+        # Step 2: Generate answer using RAG chain (without context, go straight to fallback)
+        rag_response = ""
+        if documents:
             try:
-                hallucination_score = grading_service.check_hallucination(
-                    documents=documents,
-                    generation=rag_response
+                rag_response = await deadline.run(
+                    "rag_generation",
+                    self.conversational_rag_chain.ainvoke(
+                        {
+                            "question": question,
+                            "documents": documents
+                        },
+                        config={"configurable": {"session_id": session_id}}
+                    ),
+                    default=""
                 )
-                logger.info(f"Hallucination check: {hallucination_score}")
+                if rag_response:
+                    logger.info("Generated RAG response")
             except Exception as e:
-                logger.error(f"Error checking hallucination: {e}")
+                logger.error(f"Error in RAG chain: {e}")
         
-        # Step 4: Use fallback if needed
-        if hallucination_score == "yes" or not rag_response:
-            logger.info("Using fallback due to hallucination or empty response")
+        # Step 3: Check grounding while the answer is simplified, so the
+        # critical path is the RAG call plus the slower of the two. If the
+        # local score looks doubtful, a fallback answer is prepared as well.
+        grounding = None
+        speculative = None
+        simplify_task = None
+        try:
+            if rag_response:
+                self._pipeline_stats["rag_answers"] += 1
+                local_score = get_grading_service().local_grounding_score(documents, rag_response)
+                if deadline.allows("simplification", settings.simplification_min_seconds):
+                    simplify_task = asyncio.create_task(self._asimplify(rag_response))
+                # Speculating only pays off if the LLM grader will actually run
+                if (
+                    self._should_speculate(local_score)
+                    and deadline.remaining() >= settings.grounding_check_min_seconds
+                ):
+                    self._pipeline_stats["speculative_fallbacks"] += 1
+                    speculative = asyncio.create_task(self._aspeculative_fallback(question, session_id))
+                grounding = await self._acheck_grounding_within(documents, rag_response, local_score, deadline)
+            
+            # Step 4: Keep the RAG answer, or use the fallback ("yes" = grounded).
+            # An answer whose grounding check was skipped is kept unverified.
+            if rag_response and (grounding is None or grounding["grounded"] == "yes"):
+                if speculative is not None:
+                    speculative.cancel()
+                    self._pipeline_stats["speculation_wasted"] += 1
+                final_answer = rag_response
+                simplified_answer = (
+                    await self._asimplify_within(rag_response, deadline, simplify_task)
+                    if simplify_task is not None else rag_response
+                )
+                source = "rag"
+            else:
+                if simplify_task is not None:
+                    simplify_task.cancel()
+                    self._pipeline_stats["simplifications_discarded"] += 1
+                logger.info("Using fallback due to hallucination, missing context or empty response")
+                final_answer, simplified_answer, source = await self._aresolve_fallback(
+                    question, session_id, speculative, deadline
+                )
+        finally:
+            # Also reached when a stage raises, so no task outlives the request
+            await self._acancel_pending(speculative, simplify_task)
+        
+        # The conversation is saved to chat history (Cassandra + embeddings) by
+        # RunnableWithMessageHistory through CassandraChatMessageHistory.aadd_messages,
+        # or by _aresolve_fallback when a speculative fallback answer was used
+        
+        result = {
+            "answer": final_answer,
+            "simplified_answer": simplified_answer,
+            "source": source,
+            "grounded": grounding["grounded"] if grounding else None,
+            "grounding": grounding,
+            "retrieved_docs_length": len(documents),
+            "session_id": session_id,
+            "skipped_stages": list(deadline.skipped)
+        }
+        if deadline.skipped:
+            logger.info(f"⏱️ Answered in {deadline.elapsed():.1f}s, skipped: {', '.join(deadline.skipped)}")
+        
+        self._cache_result(question, cache_embedding, result, deadline)
+        return result
+    
+    async def astream_question(
+        self,
+        question: str,
+        session_id: str,
+        timeout_ms: Optional[int] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream the RAG answer as it is generated.
+        
+        Yields events as dicts with "event" and "data" keys: "token" for each
+        generated chunk, then trailing "grounding", "simplified" and "done"
+        events. Chat history is written by RunnableWithMessageHistory once the
+        token stream has finished. Optional stages skipped to meet the latency
+        budget are listed in the "done" event; token generation itself is not
+        cut off, since a partly sent answer cannot be replaced.
+        """
+        logger.info(f"Streaming question: {question} (session: {session_id})")
+        deadline = Deadline.from_millis(timeout_ms, settings.rag_default_timeout_seconds)
+        config = {"configurable": {"session_id": session_id}}
+        
+        query_embedding = await self._aembed_question(question)
+        cache_embedding = await self._acache_embedding(session_id, query_embedding)
+        cached = await self._alookup_cache(question, session_id, cache_embedding)
+        if cached is not None:
+            yield {"event": "token", "data": {"content": cached["answer"]}}
+            yield {"event": "grounding", "data": self._grounding_event(cached["grounding"])}
+            yield {"event": "simplified", "data": {"answer": cached["simplified_answer"]}}
+            yield {
+                "event": "done",
+                "data": {
+                    "source": cached["source"],
+                    "retrieved_docs_length": cached["retrieved_docs_length"],
+                    "session_id": session_id,
+                    "skipped_stages": []
+                }
+            }
+            return
+        
+        # Step 1: Retrieve relevant documents
+        documents = await self._acontext(question, query_embedding, deadline)
+        
+        # Step 2: Stream answer tokens from the RAG chain (without context, go straight to fallback)
+        rag_tokens = []
+        if documents:
             try:
-                final_answer = self.conversational_fallback_chain.invoke(
+                async for token in self.conversational_rag_chain.astream(
+                    {"question": question, "documents": documents},
+                    config=config
+                ):
+                    rag_tokens.append(token)
+                    yield {"event": "token", "data": {"content": token}}
+            except Exception as e:
+                logger.error(f"Error in RAG chain stream: {e}")
+        rag_response = "".join(rag_tokens)
+        
+        # Nothing was sent yet, so an empty answer can still fall back to the LLM alone
+        if rag_response:
+            final_answer = rag_response
+            source = "rag"
+        else:
+            logger.info("Streaming fallback due to missing context or empty response")
+            fallback_tokens = []
+            try:
+                async for token in self.conversational_fallback_chain.astream(
                     {"question": question},
-                    config={"configurable": {"session_id": session_id}}
-                )
+                    config=config
+                ):
+                    fallback_tokens.append(token)
+                    yield {"event": "token", "data": {"content": token}}
+                final_answer = "".join(fallback_tokens)
                 source = "fallback"
             except Exception as e:
-                logger.error(f"Error in fallback chain: {e}")
+                logger.error(f"Error in fallback chain stream: {e}")
                 final_answer = "I apologize, but I'm having trouble answering your question right now."
                 source = "error"
-        else:
-            final_answer = rag_response
-            source = "rag"
-        
-        # Step 5: Simplify for UI
-        try:
-            simplified_answer = self.simplify_chain.invoke({"answer": final_answer})
-        except Exception as e:
-            logger.error(f"Error simplifying answer: {e}")
-            simplified_answer = final_answer
+                yield {"event": "token", "data": {"content": final_answer}}
         
-        # Save the conversation to chat history (embed for future retrieval)
+        # Steps 3-4: Trailing grounding verdict and simplified answer, computed
+        # concurrently (the answer is already sent, so neither waits on the other)
+        simplify_task = None
         try:
-            history_manager = session_service.get_session_history_manager(session_id)
-            # The messages are automatically saved to Cassandra and embedded
-            # through the CassandraChatMessageHistory class
-        except Exception as e:
-            logger.error(f"Error updating chat history: {e}")
+            if deadline.allows("simplification", settings.simplification_min_seconds):
+                simplify_task = asyncio.create_task(self._asimplify(final_answer))
+            grounding = None
+            if documents and source == "rag":
+                local_score = get_grading_service().local_grounding_score(documents, rag_response)
+                grounding = await self._acheck_grounding_within(documents, rag_response, local_score, deadline)
+            yield {"event": "grounding", "data": self._grounding_event(grounding)}
+            
+            simplified_answer = (
+                await self._asimplify_within(final_answer, deadline, simplify_task)
+                if simplify_task is not None else final_answer
+            )
+            yield {"event": "simplified", "data": {"answer": simplified_answer}}
+        finally:
+            # Also reached when the client disconnects and the generator is closed
+            await self._acancel_pending(simplify_task)
         
-        return {
+        self._cache_result(question, cache_embedding, {
             "answer": final_answer,
             "simplified_answer": simplified_answer,
             "source": source,
-            "hallucination_score": hallucination_score,
+            "grounded": grounding["grounded"] if grounding else None,
+            "grounding": grounding,
             "retrieved_docs_length": len(documents),
-            "session_id": session_id
+            "session_id": session_id,
+            "skipped_stages": []
+        }, deadline)
+        
+        yield {
+            "event": "done",
+            "data": {
+                "source": source,
+                "retrieved_docs_length": len(documents),
+                "session_id": session_id,
+                "skipped_stages": list(deadline.skipped)
+            }
         }
     
     def grade_document_relevance(self, question: str, document: str) -> str:
         """Grade if a document is relevant to the question"""
-        return grading_service.grade_document_relevance(question, document)
+        return get_grading_service().grade_document_relevance(question, document)
 
-# Singleton instance
-rag_service = RAGService()
\ No newline at end of file
+@container.component("rag_service")
+def get_rag_service() -> RAGService:
+    """Get the shared RAGService, constructed on first use"""
+    return RAGService()
\ No newline at end of file
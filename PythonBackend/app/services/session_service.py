@@ -1,26 +1,73 @@
-from typing import List, Dict, Any
+from typing import Dict, Any
+from collections import OrderedDict
+from threading import Lock
 from app.core.database import cassandra_conn
 from app.models.cassandra_history import CassandraChatMessageHistory
+from app.models.session_index import CassandraSessionIndex
+from app.core.container import container
+from app.config import get_settings
 from datetime import datetime
 import json
+import time
 import logging
 
 logger = logging.getLogger(__name__)
+settings = get_settings()
 
 class SessionService:
-    def __init__(self):
-        self._history_store = {}
+    def __init__(
+        self,
+        max_sessions: int = settings.session_cache_max_size,
+        idle_ttl_seconds: int = settings.session_idle_ttl_seconds
+    ):
+        # session_id -> (history manager, last access time), least recently used first
+        self._history_store: "OrderedDict[str, tuple]" = OrderedDict()
+        self._max_sessions = max_sessions
+        self._idle_ttl = idle_ttl_seconds
+        self._lock = Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+        self._session_index = None
+    
+    def get_session_index(self) -> CassandraSessionIndex:
+        """Get the cluster-wide session index, created on first use"""
+        if self._session_index is None:
+            self._session_index = CassandraSessionIndex(cassandra_conn.get_session())
+        return self._session_index
+    
+    def _evict(self, now: float) -> None:
+        """Drop idle sessions, then least recently used ones beyond the size bound"""
+        while self._history_store:
+            session_id, (_, last_access) = next(iter(self._history_store.items()))
+            if now - last_access <= self._idle_ttl:
+                break
+            del self._history_store[session_id]
+            self._stats["expirations"] += 1
+        
+        while len(self._history_store) > self._max_sessions:
+            self._history_store.popitem(last=False)
+            self._stats["evictions"] += 1
     
     def get_session_history_manager(self, session_id: str) -> CassandraChatMessageHistory:
         """Get or create session history manager"""
-        if session_id not in self._history_store:
-            self._history_store[session_id] = CassandraChatMessageHistory(
-                cass_session=cassandra_conn.get_session(),
-                table_name="chat_history",
-                session_id=session_id,
-                message_limit=10
-            )
-        return self._history_store[session_id]
+        now = time.time()
+        with self._lock:
+            entry = self._history_store.get(session_id)
+            if entry is not None:
+                self._stats["hits"] += 1
+                history_manager = entry[0]
+            else:
+                self._stats["misses"] += 1
+                history_manager = CassandraChatMessageHistory(
+                    cass_session=cassandra_conn.get_session(),
+                    table_name="chat_history",
+                    session_id=session_id,
+                    message_limit=10,
+                    session_index=self.get_session_index()
+                )
+            self._history_store[session_id] = (history_manager, now)
+            self._history_store.move_to_end(session_id)
+            self._evict(now)
+        return history_manager
     
     def get_session_history(self, session_id: str):
         """Get messages for a session"""
@@ -29,13 +76,24 @@ class SessionService:
     
     def clear_session(self, session_id: str):
         """Clear session history"""
-        if session_id in self._history_store:
-            self._history_store[session_id].clear()
-            del self._history_store[session_id]
+        # The session may have been evicted from the cache but still exist in Cassandra
+        self.get_session_history_manager(session_id).clear()
+        with self._lock:
+            self._history_store.pop(session_id, None)
+    
+    def list_active_sessions(self, page_size: int = 50, page_token: str = None) -> Dict[str, Any]:
+        """Get a page of active sessions across all API replicas"""
+        return self.get_session_index().list_sessions(page_size, page_token)
     
-    def list_active_sessions(self) -> List[str]:
-        """Get list of active sessions"""
-        return list(self._history_store.keys())
+    def get_stats(self) -> Dict[str, Any]:
+        """Get session cache size and eviction metrics"""
+        with self._lock:
+            return {
+                **self._stats,
+                "size": len(self._history_store),
+                "max_size": self._max_sessions,
+                "idle_ttl_seconds": self._idle_ttl
+            }
     
     def export_session(self, session_id: str) -> Dict[str, Any]:
         """Export session data"""
@@ -54,5 +112,7 @@ class SessionService:
             ]
         }
 
-# Singleton instance
-session_service = SessionService()
\ No newline at end of file
+@container.component("session_service")
+def get_session_service() -> SessionService:
+    """Get the shared SessionService, constructed on first use"""
+    return SessionService()
\ No newline at end of file
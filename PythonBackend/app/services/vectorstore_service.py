@@ -1,11 +1,23 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Set
 from pathlib import Path
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_community.document_loaders import DirectoryLoader, PyPDFLoader, TextLoader
 from langchain.schema import Document
-from app.core.vectorstore import vector_store_manager
+from concurrent.futures import ProcessPoolExecutor
+from threading import Lock
+from uuid import uuid4
+import multiprocessing
+from app.core.vectorstore import get_vector_store_manager
 from app.core.embeddings import get_embeddings
+from app.core.embedding_scheduler import EmbeddingScheduler
+from app.core.ingestion_journal import IngestionJournal
+from app.core.lexical_index import get_lexical_index
 from app.config import get_settings
+from datetime import datetime
+from app.utils.document_loading import load_and_split_file
+from app.core.container import container
+import asyncio
+import hashlib
+import json
+import os
 import time
 import logging
 
@@ -15,124 +27,469 @@ settings = get_settings()
 class VectorStoreService:
     def __init__(self):
         self.embeddings = get_embeddings()
-        self.text_splitter = RecursiveCharacterTextSplitter.from_tiktoken_encoder(
-            chunk_size=settings.chunk_size,
-            chunk_overlap=settings.chunk_overlap,
-        )
+        self.scheduler = EmbeddingScheduler(self.embeddings)
+        self.journal = IngestionJournal(settings.vectorstore_dir / "ingest_journal.jsonl")
+        self._sync_lock = Lock()
+        self._sync_task = None
+        self._ingestion = {
+            "state": "idle",
+            "started_at": None,
+            "finished_at": None,
+            "report": None,
+            "error": None
+        }
+        self._store_lock = Lock()
+        # A complete index left by a previous run serves questions while it is re-synced
+        self._ready = self._has_complete_index()
     
     def check_vectorstore_exists(self) -> bool:
         """Check if vectorstore exists and has documents"""
-        return vector_store_manager.check_store_exists("main")
+        return get_vector_store_manager().check_store_exists("main")
     
-    def load_documents(self) -> List[Document]:
-        """Load documents from data directory"""
-        logger.info(f"📂 Loading documents from {settings.data_dir}")
-        all_docs = []
+    def _has_complete_index(self) -> bool:
+        """
+        True if the manifest describes what the store holds and the store has documents.
         
-        if not settings.data_dir.exists():
-            logger.error(f"Data directory not found: {settings.data_dir}")
-            return []
+        That is the case unless an ingestion job was interrupted before saving
+        its manifest; a job that ran to the end but left failed files to retry
+        next time did save one.
+        """
+        manifest = self._load_manifest()
+        if manifest is None:
+            return False
+        if self.journal.resumable and manifest.get("job_id") != self.journal.job_id:
+            return False
+        return self.check_vectorstore_exists()
+    
+    def is_ready(self) -> bool:
+        """
+        The main store can serve questions once it holds a complete index.
         
-        # Load PDF documents
+        Decided at startup and after each sync, so this never touches Chroma;
+        a store that is partly ingested, resuming, or only holds memory saves
+        is not ready. Once ready, later re-syncs keep serving the previous corpus.
+        """
+        return self._ready
+    
+    def _run_tracked_sync(self) -> Optional[Dict[str, Any]]:
+        """Run a sync while recording its state; returns None if one is already running"""
+        if not self._sync_lock.acquire(blocking=False):
+            logger.info("Vectorstore sync already running")
+            return None
         try:
-            pdf_loader = DirectoryLoader(
-                str(settings.data_dir),
-                glob="**/*.pdf",
-                loader_cls=PyPDFLoader,
-            )
-            pdf_docs = pdf_loader.load()
-            all_docs.extend(pdf_docs)
-            logger.info(f"✅ Loaded {len(pdf_docs)} PDF documents")
+            self._ingestion.update({
+                "state": "running",
+                "started_at": datetime.utcnow().isoformat(),
+                "finished_at": None,
+                "report": None,
+                "error": None
+            })
+            report = self.sync_vectorstore()
+            self._ingestion.update({
+                "state": "failed" if report["failed_files"] else "completed",
+                "report": report
+            })
+            return report
         except Exception as e:
-            logger.warning(f"Could not load PDF documents: {e}")
+            logger.error(f"Vectorstore sync failed: {e}")
+            self._ingestion.update({"state": "failed", "error": str(e)})
+            return None
+        finally:
+            self._ingestion["finished_at"] = datetime.utcnow().isoformat()
+            if not self._ready:
+                try:
+                    self._ready = self._has_complete_index()
+                except Exception as e:
+                    logger.error(f"Could not check vectorstore readiness: {e}")
+            self._sync_lock.release()
+    
+    def start_background_sync(self) -> bool:
+        """
+        Start syncing the vectorstore in a worker thread.
         
-        # Load text documents
-        try:
-            txt_loader = DirectoryLoader(
-                str(settings.data_dir),
-                glob="**/*.txt",
-                loader_cls=TextLoader,
-                loader_kwargs={"encoding": "utf-8", "errors": "ignore"}
+        Returns:
+            False if a sync is already running
+        """
+        if self._sync_task is not None and not self._sync_task.done():
+            return False
+        self._ingestion["state"] = "queued"
+        self._sync_task = asyncio.create_task(asyncio.to_thread(self._run_tracked_sync))
+        return True
+    
+    def get_ingestion_status(self) -> Dict[str, Any]:
+        """Get background ingestion state and progress"""
+        return {
+            **self._ingestion,
+            "ready": self.is_ready(),
+            "job": self.journal.status()
+        }
+    
+    def _worker_count(self, jobs: int) -> int:
+        workers = settings.ingest_workers or os.cpu_count() or 1
+        return max(1, min(workers, jobs))
+    
+    def _run_per_file(self, fn, paths: List[str], *args) -> Dict[str, Any]:
+        """
+        Run fn(path, *args) for every file across a process pool.
+        
+        Returns:
+            Results keyed by path in input order; failures map to the exception
+        """
+        results = {}
+        workers = self._worker_count(len(paths))
+        if workers == 1:
+            for path in paths:
+                try:
+                    results[path] = fn(path, *args)
+                except Exception as e:
+                    results[path] = e
+            return results
+        
+        # "spawn" keeps workers from inheriting this process's threads and clients
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn")
+        ) as executor:
+            futures = [(path, executor.submit(fn, path, *args)) for path in paths]
+            for path, future in futures:
+                try:
+                    results[path] = future.result()
+                except Exception as e:
+                    results[path] = e
+        return results
+    
+    def load_and_split_files(self, paths: List[str]):
+        """
+        Parse and split files in parallel.
+        
+        Returns:
+            (chunks per path in input order, errors per path, throughput stats)
+        """
+        started = time.perf_counter()
+        results = self._run_per_file(
+            load_and_split_file, paths, settings.chunk_size, settings.chunk_overlap
+        )
+        elapsed = max(time.perf_counter() - started, 1e-9)
+        
+        chunks_by_path = {}
+        errors = {}
+        pages = 0
+        for path, result in results.items():
+            if isinstance(result, Exception):
+                errors[path] = str(result)
+                continue
+            page_count, chunks = result
+            pages += page_count
+            chunks_by_path[path] = chunks
+        
+        total_chunks = sum(len(chunks) for chunks in chunks_by_path.values())
+        stats = {
+            "files": len(paths),
+            "workers": self._worker_count(len(paths)),
+            "pages": pages,
+            "chunks": total_chunks,
+            "seconds": round(elapsed, 3),
+            "pages_per_second": round(pages / elapsed, 2),
+            "chunks_per_second": round(total_chunks / elapsed, 2)
+        }
+        logger.info(
+            f"✂️ Loaded {pages} pages into {total_chunks} chunks from {len(paths)} files in "
+            f"{elapsed:.1f}s ({stats['pages_per_second']} pages/s, "
+            f"{stats['chunks_per_second']} chunks/s, {stats['workers']} workers)"
+        )
+        return chunks_by_path, errors, stats
+    
+    @staticmethod
+    def _chroma_metadata(doc: Document, chunk_id: str) -> Dict[str, Any]:
+        """Chroma only accepts primitive metadata values"""
+        metadata = {
+            key: value if isinstance(value, (str, int, float, bool)) else str(value)
+            for key, value in doc.metadata.items()
+            if value is not None
+        }
+        metadata["chunk_id"] = chunk_id
+        return metadata
+    
+    def _store_embedded_batch(
+        self,
+        docs: List[Document],
+        ids: List[str],
+        vectors: List[List[float]]
+    ) -> None:
+        """Write a batch with pre-computed embeddings to the main store"""
+        collection = get_vector_store_manager().get_main_store()._collection
+        # Embedding runs concurrently, writes to the local store are serialized
+        with self._store_lock:
+            collection.upsert(
+                ids=ids,
+                embeddings=vectors,
+                metadatas=[self._chroma_metadata(doc, chunk_id) for doc, chunk_id in zip(docs, ids)],
+                documents=[doc.page_content for doc in docs]
             )
-            txt_docs = txt_loader.load()
-            all_docs.extend(txt_docs)
-            logger.info(f"✅ Loaded {len(txt_docs)} text documents")
-        except Exception as e:
-            logger.warning(f"Could not load text documents: {e}")
+            get_lexical_index().add_many(ids, [doc.page_content for doc in docs])
+    
+    def delete_chunks(self, ids: List[str]) -> None:
+        """Delete chunks from the main store and the lexical index"""
+        if not ids:
+            return
+        collection = get_vector_store_manager().get_main_store()._collection
+        with self._store_lock:
+            collection.delete(ids=ids)
+            get_lexical_index().remove_many(ids)
+    
+    def _backfill_lexical_index(self) -> int:
+        """Index chunks stored before the lexical index existed"""
+        lexical_index = get_lexical_index()
+        collection = get_vector_store_manager().get_main_store()._collection
+        if lexical_index.count() or not collection.count():
+            return 0
         
-        logger.info(f"📊 Total documents loaded: {len(all_docs)}")
-        return all_docs
+        logger.info("🔤 Building lexical index from the existing vectorstore")
+        indexed = 0
+        page_size = 1000
+        while True:
+            page = collection.get(include=["documents"], limit=page_size, offset=indexed)
+            if not page["ids"]:
+                break
+            lexical_index.add_many(page["ids"], page["documents"])
+            indexed += len(page["ids"])
+        logger.info(f"🔤 Indexed {indexed} existing chunks for lexical search")
+        return indexed
     
-    def embed_documents_safely(self, docs: List[Document], batch_size: int = 10) -> bool:
-        """Embed documents in batches with error handling"""
+    def embed_documents_scheduled(
+        self,
+        docs: List[Document],
+        ids: Optional[List[str]] = None,
+        on_batch_done=None
+    ) -> Dict[str, Any]:
+        """
+        Embed documents into the main store through the embedding scheduler.
+        
+        Returns:
+            Scheduler report, including the ids of chunks that failed
+        """
         logger.info(f"🚀 Embedding {len(docs)} document chunks")
+        ids = ids or [str(uuid4()) for _ in docs]
+        report = self.scheduler.run(docs, ids, self._store_embedded_batch, on_batch_done)
         
+        if report["embedded"]:
+            vector_store_manager = get_vector_store_manager()
+            vector_store_manager.get_main_store().persist()
+            vector_store_manager.bump_version("main")
+        return report
+    
+    @property
+    def manifest_path(self) -> Path:
+        return settings.vectorstore_dir / "ingest_manifest.json"
+    
+    def _load_manifest(self) -> Optional[Dict[str, Any]]:
+        """Load the ingestion manifest, or None if there is none yet"""
+        if not self.manifest_path.exists():
+            return None
         try:
-            vectorstore = vector_store_manager.get_main_store()
-            
-            # Check current count
-            try:
-                current_count = vectorstore._collection.count()
-                logger.info(f"📊 Current vectorstore contains {current_count} documents")
-            except:
-                current_count = 0
-            
-            # Add documents in batches
-            total_batches = (len(docs) + batch_size - 1) // batch_size
-            
-            for i in range(0, len(docs), batch_size):
-                batch = docs[i:i+batch_size]
-                batch_num = (i // batch_size) + 1
-                
-                logger.info(f"⏳ Processing batch {batch_num}/{total_batches}")
-                
-                try:
-                    vectorstore.add_documents(batch)
-                    logger.info(f"✅ Added batch {batch_num}/{total_batches}")
-                    time.sleep(1)  # Rate limiting
-                except Exception as e:
-                    logger.error(f"Error adding batch {batch_num}: {e}")
-                    time.sleep(10)
-                    # Retry once
-                    try:
-                        vectorstore.add_documents(batch)
-                        logger.info(f"✅ Added batch {batch_num} on retry")
-                    except Exception as retry_error:
-                        logger.error(f"Failed to add batch {batch_num} even on retry: {retry_error}")
-                        continue
-            
-            # Persist changes
-            vectorstore.persist()
-            return True
-            
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                return json.load(f)
         except Exception as e:
-            logger.error(f"Error embedding documents: {e}")
-            return False
+            logger.warning(f"Could not read ingestion manifest, rebuilding it: {e}")
+            return None
     
-    def setup_vectorstore(self) -> bool:
-        """Setup vectorstore from documents in data directory"""
-        logger.info("🚀 Setting up vectorstore...")
+    def _save_manifest(self, manifest: Dict[str, Any]) -> None:
+        """Write the manifest atomically next to the vectorstore"""
+        self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.manifest_path.with_suffix(".json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+    
+    def _new_manifest(self) -> Dict[str, Any]:
+        return {
+            "chunk_size": settings.chunk_size,
+            "chunk_overlap": settings.chunk_overlap,
+            "files": {}
+        }
+    
+    @staticmethod
+    def _hash_file(path: Path) -> str:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+        return digest.hexdigest()
+    
+    def _scan_data_dir(self) -> Dict[str, str]:
+        """Map each PDF/TXT file under the data directory to its content hash"""
+        files = {}
+        for pattern in ("**/*.pdf", "**/*.txt"):
+            for path in sorted(settings.data_dir.glob(pattern)):
+                if path.is_file():
+                    files[str(path)] = self._hash_file(path)
+        return files
+    
+    @staticmethod
+    def _chunk_ids(path: str, file_hash: str, count: int) -> List[str]:
+        """Deterministic chunk ids derived from the file path, content and chunking settings"""
+        key = f"{path}:{file_hash}:{settings.chunk_size}:{settings.chunk_overlap}"
+        prefix = hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+        return [f"{prefix}-{i:05d}" for i in range(count)]
+    
+    def _adopt_existing_store(self, files: Dict[str, str], done_ids: Set[str]) -> Dict[str, Any]:
+        """
+        Build a manifest for a store that was populated before manifests existed.
         
-        # Load documents
-        docs = self.load_documents()
-        if not docs:
-            logger.error("No documents found!")
-            return False
+        Chunks are matched to files through their "source" metadata so the
+        first sync does not embed the whole corpus a second time. Files with
+        chunks stored by an interrupted job (`done_ids`) may be incomplete, so
+        they are left out and planned again; chunks that already landed are
+        then skipped by the resume.
+        """
+        manifest = self._new_manifest()
+        collection = get_vector_store_manager().get_main_store()._collection
+        for path, file_hash in files.items():
+            existing = collection.get(where={"source": path}, include=[])
+            if existing["ids"] and done_ids.isdisjoint(existing["ids"]):
+                manifest["files"][path] = {"sha256": file_hash, "chunk_ids": existing["ids"]}
+        logger.info(f"📋 Adopted {len(manifest['files'])} already-indexed files into a new manifest")
+        return manifest
+    
+    def sync_vectorstore(self) -> Dict[str, Any]:
+        """
+        Bring the main vectorstore in line with the data directory.
         
-        # Split documents
-        logger.info("✂️ Splitting documents into chunks...")
-        docs_split = self.text_splitter.split_documents(docs)
-        logger.info(f"📄 Split into {len(docs_split)} chunks")
+        Only new or changed files are loaded and embedded; chunks of changed
+        and removed files are deleted. Returns a report of what changed.
+        """
+        logger.info(f"🔄 Syncing vectorstore with {settings.data_dir}")
+        report = {
+            "added_files": [],
+            "changed_files": [],
+            "removed_files": [],
+            "failed_files": [],
+            "unchanged_files": 0,
+            "chunks_added": 0,
+            "chunks_deleted": 0
+        }
         
-        # Embed documents
-        success = self.embed_documents_safely(docs_split)
+        if not settings.data_dir.exists():
+            logger.error(f"Data directory not found: {settings.data_dir}")
+            return report
         
-        if success:
-            logger.info("✅ Vectorstore setup completed successfully!")
-            return True
-        else:
-            logger.error("❌ Failed to setup vectorstore")
-            return False
+        report["lexical_backfilled"] = self._backfill_lexical_index()
+        
+        done_ids = self.journal.begin()
+        try:
+            files = self._scan_data_dir()
+            manifest = self._load_manifest()
+            if manifest is None:
+                manifest = (
+                    self._adopt_existing_store(files, done_ids)
+                    if self.check_vectorstore_exists() else self._new_manifest()
+                )
+            elif (manifest.get("chunk_size"), manifest.get("chunk_overlap")) != \
+                    (settings.chunk_size, settings.chunk_overlap):
+                # Chunking changed: every file is re-split (unchanged chunks hit the embedding cache)
+                logger.info("✂️ Chunking settings changed, re-indexing all files")
+                manifest["chunk_size"] = settings.chunk_size
+                manifest["chunk_overlap"] = settings.chunk_overlap
+                for entry in manifest["files"].values():
+                    entry["sha256"] = None
+        
+            indexed = manifest["files"]
+            to_delete = []
+            to_index = []
+            for path in sorted(set(indexed) - set(files)):
+                report["removed_files"].append(path)
+                to_delete.extend(indexed.pop(path)["chunk_ids"])
+            for path, file_hash in files.items():
+                entry = indexed.get(path)
+                if entry is None:
+                    report["added_files"].append(path)
+                    to_index.append(path)
+                elif entry["sha256"] != file_hash:
+                    report["changed_files"].append(path)
+                    to_delete.extend(entry["chunk_ids"])
+                    to_index.append(path)
+                else:
+                    report["unchanged_files"] += 1
+        
+            vectorstore = get_vector_store_manager().get_main_store()
+            if to_delete:
+                self.delete_chunks(to_delete)
+                report["chunks_deleted"] = len(to_delete)
+                # Deleted chunks must be embedded again even if the interrupted job stored them
+                done_ids = done_ids - set(to_delete)
+                for path in report["changed_files"]:
+                    indexed.pop(path, None)
+                logger.info(f"🗑️ Deleted {len(to_delete)} stale chunks")
+        
+            chunks_by_path, load_errors, report["load_stats"] = self.load_and_split_files(to_index)
+            all_chunks = []
+            all_ids = []
+            file_ids = {}
+            for path in to_index:
+                if path in load_errors:
+                    logger.error(f"Could not load {path}: {load_errors[path]}")
+                    report["failed_files"].append(path)
+                    continue
+                chunks = chunks_by_path[path]
+                file_ids[path] = self._chunk_ids(path, files[path], len(chunks))
+                all_chunks.extend(chunks)
+                all_ids.extend(file_ids[path])
+        
+            # Chunks a resumed job stored for file versions that are no longer
+            # planned (the file changed again since) are orphans
+            indexed_ids = {chunk_id for entry in indexed.values() for chunk_id in entry["chunk_ids"]}
+            orphans = done_ids - set(all_ids) - indexed_ids
+            if orphans:
+                self.delete_chunks(list(orphans))
+                logger.info(f"🗑️ Deleted {len(orphans)} orphaned chunks from the interrupted job")
+        
+            # Skip chunks the interrupted job already stored
+            pending = [(doc, chunk_id) for doc, chunk_id in zip(all_chunks, all_ids) if chunk_id not in done_ids]
+            report["chunks_resumed"] = len(all_ids) - len(pending)
+            self.journal.record_plan(len(all_ids))
+        
+            failed_ids = set()
+            if pending:
+                embed_report = self.embed_documents_scheduled(
+                    [doc for doc, _ in pending],
+                    [chunk_id for _, chunk_id in pending],
+                    on_batch_done=self.journal.record_batch
+                )
+                report["embed_stats"] = {k: v for k, v in embed_report.items() if k != "failed_ids"}
+                failed_ids = set(embed_report["failed_ids"])
+        
+            # Only record files whose chunks all landed, so failures retry next sync
+            for path, chunk_ids in file_ids.items():
+                missing = [chunk_id for chunk_id in chunk_ids if chunk_id in failed_ids]
+                if missing:
+                    logger.error(f"{len(missing)}/{len(chunk_ids)} chunks of {path} failed to embed")
+                    report["failed_files"].append(path)
+                else:
+                    indexed[path] = {"sha256": files[path], "chunk_ids": chunk_ids}
+                    report["chunks_added"] += len(chunk_ids)
+        
+            manifest["job_id"] = self.journal.job_id
+            self._save_manifest(manifest)
+            if to_delete or report["chunks_added"]:
+                vectorstore.persist()
+                get_vector_store_manager().bump_version("main")
+        
+            # The job is only complete once every planned file has loaded and
+            # every planned chunk has landed
+            if not failed_ids and not load_errors:
+                self.journal.complete()
+            report["job"] = self.journal.status()
+        
+        finally:
+            if not self.journal.completed:
+                self.journal.suspend()
+        
+        logger.info(
+            f"✅ Sync complete: {len(report['added_files'])} added, "
+            f"{len(report['changed_files'])} changed, {len(report['removed_files'])} removed, "
+            f"{report['unchanged_files']} unchanged, {len(report['failed_files'])} failed"
+        )
+        return report
     
     def get_stats(self) -> Dict[str, Any]:
         """Get vectorstore statistics"""
@@ -144,7 +501,7 @@ class VectorStoreService:
         
         try:
             # Main store
-            main_store = vector_store_manager.get_main_store()
+            main_store = get_vector_store_manager().get_main_store()
             stats["main_store"]["exists"] = True
             stats["main_store"]["count"] = main_store._collection.count()
         except Exception as e:
@@ -152,7 +509,7 @@ class VectorStoreService:
         
         try:
             # Chat store
-            chat_store = vector_store_manager.get_chat_store()
+            chat_store = get_vector_store_manager().get_chat_store()
             stats["chat_store"]["exists"] = True
             stats["chat_store"]["count"] = chat_store._collection.count()
         except Exception as e:
@@ -160,14 +517,17 @@ class VectorStoreService:
         
         try:
             # PDF store
-            pdf_store = vector_store_manager.get_pdf_store()
+            pdf_store = get_vector_store_manager().get_pdf_store()
             stats["pdf_store"]["exists"] = True
             stats["pdf_store"]["count"] = pdf_store._collection.count()
         except Exception as e:
             logger.error(f"Error getting PDF store stats: {e}")
         
         stats["total_documents"] = sum(store["count"] for store in stats.values())
+        stats["lexical_index"] = get_lexical_index().get_stats()
         return stats
 
-# Singleton instance
-vectorstore_service = VectorStoreService()
\ No newline at end of file
+@container.component("vectorstore_service")
+def get_vectorstore_service() -> VectorStoreService:
+    """Get the shared VectorStoreService, constructed on first use"""
+    return VectorStoreService()
\ No newline at end of file
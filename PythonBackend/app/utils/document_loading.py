@@ -0,0 +1,35 @@
+# Per-file loading and splitting for ingestion worker processes. Workers are
+# started with "spawn", so keep this module's imports light: it must not pull
+# in the app services (and their API clients) when a worker imports it.
+from functools import lru_cache
+from typing import List, Tuple
+from langchain.schema import Document
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from langchain_community.document_loaders import PyPDFLoader, TextLoader
+
+
+@lru_cache()
+def _get_splitter(chunk_size: int, chunk_overlap: int) -> RecursiveCharacterTextSplitter:
+    """Build the tiktoken splitter once per worker process"""
+    return RecursiveCharacterTextSplitter.from_tiktoken_encoder(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+    )
+
+
+def load_file(path: str) -> List[Document]:
+    """Load a single PDF (one document per page) or text file"""
+    if path.lower().endswith(".pdf"):
+        return PyPDFLoader(path).load()
+    return TextLoader(path, encoding="utf-8", autodetect_encoding=True).load()
+
+
+def load_and_split_file(path: str, chunk_size: int, chunk_overlap: int) -> Tuple[int, List[Document]]:
+    """
+    Parse and split one file.
+
+    Returns:
+        (number of pages/documents loaded, chunks in document order)
+    """
+    docs = load_file(path)
+    return len(docs), _get_splitter(chunk_size, chunk_overlap).split_documents(docs)
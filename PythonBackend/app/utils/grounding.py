@@ -0,0 +1,102 @@
+from typing import List, Set, Tuple
+import re
+from app.core.lexical_index import tokenize
+
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?])\s+|\n+")
+_NEGATION = re.compile(r"\b(?:not|no|never|none|nor|neither|cannot|without)\b|n't\b")
+_NEGATION_TOKENS = frozenset("not no never none nor neither cannot without t".split())
+
+# Sentences shorter than this carry too little signal to score on their own
+_MIN_SENTENCE_TOKENS = 3
+
+# Share of an answer sentence's words a context sentence must contain to count as its source
+_RESTATEMENT_OVERLAP = 0.5
+
+# How far below the accept threshold a held-back score is placed
+_BAND_MARGIN = 0.001
+
+
+def _ngrams(tokens: List[str]) -> Tuple[Set[str], Set[Tuple[str, str]]]:
+    return set(tokens), set(zip(tokens, tokens[1:]))
+
+
+def lexical_grounding_score(documents: str, answer: str) -> float:
+    """
+    Share of the answer supported word-for-word by the documents, from 0 to 1.
+
+    Each answer sentence is scored by how many of its unigrams and bigrams
+    occur in the documents; sentence scores are averaged weighted by length.
+    Answers too short to score return 0.5 so they land in the uncertain band.
+    """
+    doc_unigrams, doc_bigrams = _ngrams(tokenize(documents))
+    weighted = 0.0
+    total = 0
+    for sentence in _SENTENCE_BREAK.split(answer):
+        tokens = tokenize(sentence)
+        if len(tokens) < _MIN_SENTENCE_TOKENS:
+            continue
+        unigrams, bigrams = _ngrams(tokens)
+        unigram_coverage = len(unigrams & doc_unigrams) / len(unigrams)
+        bigram_coverage = len(bigrams & doc_bigrams) / len(bigrams) if bigrams else unigram_coverage
+        weighted += len(tokens) * (unigram_coverage + bigram_coverage) / 2
+        total += len(tokens)
+    return weighted / total if total else 0.5
+
+
+def content_overlap(documents: str, answer: str) -> float:
+    """Share of the answer's distinct content words that occur in the documents"""
+    answer_words = set(tokenize(answer)) - _NEGATION_TOKENS
+    if not answer_words:
+        return 0.0
+    return len(answer_words & set(tokenize(documents))) / len(answer_words)
+
+
+def negation_mismatch(documents: str, answer: str) -> bool:
+    """
+    True if an answer sentence restates a document sentence with the opposite polarity.
+
+    Each answer sentence is matched to the document sentence sharing most of
+    its words; a "not" present in only one of the two flips the meaning while
+    leaving the word overlap almost unchanged.
+    """
+    doc_sentences = [
+        (set(tokenize(sentence)) - _NEGATION_TOKENS, bool(_NEGATION.search(sentence.lower())))
+        for sentence in _SENTENCE_BREAK.split(documents)
+    ]
+    for sentence in _SENTENCE_BREAK.split(answer):
+        words = set(tokenize(sentence)) - _NEGATION_TOKENS
+        if len(words) < _MIN_SENTENCE_TOKENS:
+            continue
+        overlap, source_negated = max(
+            ((len(words & doc_words), doc_negated) for doc_words, doc_negated in doc_sentences),
+            key=lambda match: match[0],
+            default=(0, False)
+        )
+        negated = bool(_NEGATION.search(sentence.lower()))
+        if overlap / len(words) >= _RESTATEMENT_OVERLAP and negated != source_negated:
+            return True
+    return False
+
+
+def banded_grounding_score(
+    documents: str,
+    answer: str,
+    accept_above: float,
+    reject_below: float,
+    reject_max_overlap: float
+) -> float:
+    """
+    lexical_grounding_score, held inside the uncertain band when overlap alone can't decide.
+
+    A high score is not trusted if the answer flips a negation of the
+    context, and a low score is not trusted while the answer still shares
+    at least `reject_max_overlap` of its content words with the context
+    (a paraphrase); both are moved into [reject_below, accept_above) so the
+    LLM grader settles them.
+    """
+    score = lexical_grounding_score(documents, answer)
+    if score >= accept_above and negation_mismatch(documents, answer):
+        return min(score, accept_above - _BAND_MARGIN)
+    if score < reject_below and content_overlap(documents, answer) >= reject_max_overlap:
+        return reject_below
+    return score
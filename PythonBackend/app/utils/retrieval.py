@@ -0,0 +1,60 @@
+from typing import List, Optional, Sequence
+import numpy as np
+
+
+def cosine_similarities(query: Sequence[float], candidates: np.ndarray) -> np.ndarray:
+    """Cosine similarity of a query vector to each row of a candidate matrix"""
+    query = np.asarray(query, dtype=np.float32)
+    norms = np.linalg.norm(candidates, axis=1) * np.linalg.norm(query)
+    return (candidates @ query) / np.where(norms == 0, 1.0, norms)
+
+
+def adaptive_cutoff(
+    scores: np.ndarray,
+    min_score: float,
+    margin: float,
+    exempt: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """
+    Indices of candidates worth sending to the LLM.
+
+    A candidate is kept if it clears the absolute `min_score` and is within
+    `margin` of the best score, so a clear winner is sent alone while a flat
+    score distribution keeps several chunks. `exempt` marks candidates kept
+    regardless of score (e.g. exact lexical matches).
+    """
+    if not scores.size:
+        return np.flatnonzero(scores)
+    keep = scores >= max(min_score, float(scores.max()) - margin)
+    if exempt is not None:
+        keep = keep | exempt
+    return np.flatnonzero(keep)
+
+
+def maximal_marginal_relevance(
+    relevance: np.ndarray,
+    embeddings: np.ndarray,
+    k: int,
+    lambda_mult: float
+) -> List[int]:
+    """
+    Greedy MMR selection.
+
+    Each step picks the candidate maximising
+    lambda * relevance - (1 - lambda) * max similarity to already picked ones.
+    """
+    if not relevance.size or k <= 0:
+        return []
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    unit = embeddings / np.where(norms == 0, 1.0, norms)
+    pairwise = unit @ unit.T
+
+    selected = [int(np.argmax(relevance))]
+    redundancy = pairwise[selected[0]].copy()
+    while len(selected) < min(k, relevance.size):
+        scores = lambda_mult * relevance - (1 - lambda_mult) * redundancy
+        scores[selected] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        redundancy = np.maximum(redundancy, pairwise[best])
+    return selected
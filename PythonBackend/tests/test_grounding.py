@@ -0,0 +1,56 @@
+from app.utils.grounding import (
+    banded_grounding_score,
+    content_overlap,
+    lexical_grounding_score,
+    negation_mismatch,
+)
+
+CONTEXT = (
+    "Fire doors must provide 30 minutes of fire resistance. "
+    "Escape routes in residential buildings must be kept clear of storage."
+)
+
+BANDS = {"accept_above": 0.75, "reject_below": 0.2, "reject_max_overlap": 0.25}
+
+
+def test_verbatim_answer_scores_high():
+    answer = "Fire doors must provide 30 minutes of fire resistance."
+    assert lexical_grounding_score(CONTEXT, answer) > 0.9
+    assert banded_grounding_score(CONTEXT, answer, **BANDS) >= BANDS["accept_above"]
+
+
+def test_unrelated_answer_is_rejected_locally():
+    answer = "The Eiffel Tower was completed in Paris during the year 1889."
+    assert content_overlap(CONTEXT, answer) < BANDS["reject_max_overlap"]
+    assert banded_grounding_score(CONTEXT, answer, **BANDS) < BANDS["reject_below"]
+
+
+def test_short_answer_lands_in_uncertain_band():
+    assert lexical_grounding_score(CONTEXT, "Yes.") == 0.5
+
+
+def test_negated_restatement_is_escalated():
+    answer = "Fire doors must not provide 30 minutes of fire resistance."
+    assert negation_mismatch(CONTEXT, answer)
+    assert lexical_grounding_score(CONTEXT, answer) >= BANDS["accept_above"]
+    score = banded_grounding_score(CONTEXT, answer, **BANDS)
+    assert BANDS["reject_below"] <= score < BANDS["accept_above"]
+
+
+def test_contracted_negation_is_detected():
+    answer = "Escape routes in residential buildings don't need to be kept clear of storage."
+    assert negation_mismatch(CONTEXT, answer)
+
+
+def test_matching_polarity_is_not_a_mismatch():
+    context = "Fire doors must not be wedged open."
+    assert not negation_mismatch(context, "Fire doors must not be wedged open at any time.")
+    assert not negation_mismatch(CONTEXT, "Fire doors must provide 30 minutes of fire resistance.")
+
+
+def test_paraphrase_with_shared_content_words_is_escalated():
+    answer = "Doors rated for fire have to resist burning for half an hour."
+    assert lexical_grounding_score(CONTEXT, answer) < BANDS["reject_below"]
+    assert content_overlap(CONTEXT, answer) >= BANDS["reject_max_overlap"]
+    score = banded_grounding_score(CONTEXT, answer, **BANDS)
+    assert BANDS["reject_below"] <= score < BANDS["accept_above"]